@@ -0,0 +1,28 @@
+"""Настройка соединений SQLite.
+
+Каждое новое соединение получает PRAGMA из SQLITE_PRAGMAS: WAL, чтобы
+чтение не ждало записи и наоборот; synchronous=NORMAL — в режиме WAL
+это безопасно и избавляет коммит от fsync; busy_timeout — писатель ждёт
+чужую блокировку, а не падает с «database is locked» (для транзакций —
+вместе с BEGIN IMMEDIATE из core.sqlite3); cache_size и
+mmap_size — страницы базы в памяти воркера. Соединения живут
+CONN_MAX_AGE секунд, так что всё это выполняется раз на соединение,
+а не на каждый запрос.
+"""
+from django.conf import settings
+
+
+def apply_pragmas(cursor, pragmas=None):
+    """Выполняет PRAGMA на курсоре DB-API (Django или sqlite3)."""
+    if pragmas is None:
+        pragmas = settings.SQLITE_PRAGMAS
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def configure_connection(sender, connection, **kwargs):
+    """Обработчик сигнала connection_created."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor)
@@ -0,0 +1,22 @@
+from django.conf import settings
+
+from . import routers
+
+
+class ReplicaPinMiddleware:
+    """Закрепляет за основной базой запросы после записи (core.routers)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        routers.start_request(
+            pinned=(request.method not in ('GET', 'HEAD', 'OPTIONS')
+                    or settings.REPLICA_PIN_COOKIE in request.COOKIES))
+        response = self.get_response(request)
+        if routers.wrote():
+            response.set_cookie(settings.REPLICA_PIN_COOKIE, '1',
+                                max_age=settings.REPLICA_PIN_SECONDS,
+                                httponly=True)
+        routers.finish_request()
+        return response
@@ -0,0 +1,80 @@
+"""Чтение с реплик, запись в основную базу.
+
+Реплики перечислены в DATABASE_REPLICAS и отстают от основной базы
+(локальная реплица обновляется командой replicate). Чтобы автор сразу
+видел свой пост, комментарий или подписку, запрос, который что-то
+записал, закрепляет браузер за основной базой cookie на
+REPLICA_PIN_SECONDS (core.middleware.ReplicaPinMiddleware); запросы
+с этой cookie и запросы, меняющие данные, читают с основной базы.
+
+С реплик читают только безопасные запросы, для которых middleware
+явно сняла закрепление. Код вне запроса — команды, потоки пула
+миниатюр — читает с основной базы: он пишет по прочитанному, и
+устаревшие данные реплики испортили бы запись. По той же причине
+запрос, который начал писать, дальше читает с основной базы, а сессии
+и пользователи (PRIMARY_APPS) всегда читаются с неё: иначе вход,
+не успевший попасть в реплику, выглядел бы как анонимный запрос.
+"""
+import os
+import random
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_state = threading.local()
+
+PRIMARY_APPS = {'auth', 'sessions'}
+
+
+def start_request(pinned):
+    _state.pinned = pinned
+    _state.wrote = False
+
+
+def finish_request():
+    """Возвращает потоку чтение с основной базы после запроса."""
+    start_request(pinned=True)
+
+
+def wrote():
+    """Писал ли в базу текущий запрос."""
+    return getattr(_state, 'wrote', False)
+
+
+def available_replicas():
+    """Реплики, с которых можно читать.
+
+    Реплика, которая указывает на основную базу (зеркало в тестах),
+    или ещё не созданная командой replicate пропускается.
+    """
+    primary = connections[DEFAULT_DB_ALIAS].settings_dict['NAME']
+    return [alias for alias in settings.DATABASE_REPLICAS
+            if connections[alias].settings_dict['NAME'] != primary
+            and os.path.exists(connections[alias].settings_dict['NAME'])]
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if (getattr(_state, 'pinned', True)
+                or model._meta.app_label in PRIMARY_APPS):
+            return DEFAULT_DB_ALIAS
+        replicas = available_replicas()
+        return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        _state.wrote = True
+        _state.pinned = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схему и данные реплики получают копированием основной базы.
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
@@ -0,0 +1,15 @@
+"""SQLite с транзакциями BEGIN IMMEDIATE.
+
+Django открывает транзакцию простым BEGIN (DEFERRED): блокировка на
+запись берётся только на первой записи. Если к этому моменту другой
+писатель уже держит её, SQLite не может повысить блокировку чтения
+и сразу отвечает «database is locked» — busy_timeout тут не ждёт.
+BEGIN IMMEDIATE берёт блокировку на запись в начале транзакции,
+и конкурирующие писатели встают в очередь на busy_timeout.
+"""
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
@@ -0,0 +1,309 @@
+import asyncio
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.db import connection, router
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from posts.models import Post
+
+from .asgi import WsgiToAsgi
+from .cache import SQLiteCache
+from .db import apply_pragmas
+from .middleware import ReplicaPinMiddleware
+from .routers import available_replicas
+from .sqlite3.base import DatabaseWrapper
+
+User = get_user_model()
+
+
+def _incr_many(location, times):
+    cache = SQLiteCache(location, {})
+    for _ in range(times):
+        cache.incr('counter')
+
+
+class SQLiteCacheTestCase(SimpleTestCase):
+    """Класс для проверки кэша в файле SQLite."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.location = os.path.join(self.directory, 'cache.sqlite3')
+        self.cache = SQLiteCache(self.location, {})
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_tests_do_not_share_project_cache(self):
+        location = settings.CACHES['default']['LOCATION']
+
+        self.assertNotEqual(location,
+                            os.path.join(settings.BASE_DIR, 'cache.sqlite3'))
+        self.assertTrue(location.startswith(tempfile.gettempdir()))
+
+    def test_get_set_delete(self):
+        self.cache.set('key', {'value': 1})
+        self.cache.set_many({'a': 1, 'b': 2})
+
+        self.assertEqual(self.cache.get('key'), {'value': 1})
+        self.assertEqual(self.cache.get_many(['a', 'b', 'c']),
+                         {'a': 1, 'b': 2})
+        self.cache.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_expiry_and_add(self):
+        self.cache.set('key', 'old', timeout=0.01)
+        time.sleep(0.02)
+
+        self.assertIsNone(self.cache.get('key'))
+        self.assertTrue(self.cache.add('key', 'new'))
+        self.assertFalse(self.cache.add('key', 'newer'))
+        self.assertEqual(self.cache.get('key'), 'new')
+
+    def test_shared_between_instances(self):
+        """Второй экземпляр (как другой воркер) видит те же данные."""
+        self.cache.set('key', 'value')
+
+        other = SQLiteCache(self.location, {})
+
+        self.assertEqual(other.get('key'), 'value')
+        other.clear()
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_incr_is_atomic_across_processes(self):
+        self.cache.set('counter', 0)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+        context = multiprocessing.get_context('fork')
+        workers = [
+            context.Process(target=_incr_many, args=(self.location, 50))
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(self.cache.get('counter'), 200)
+
+    def test_lru_eviction_keeps_byte_budget(self):
+        cache = SQLiteCache(self.location, {'OPTIONS': {'MAX_BYTES': 4096}})
+        cache.set('first', 'x' * 1000)
+        cache.set('second', 'x' * 1000)
+        # Чтение отмечает «first» как недавно использованный.
+        cache._db.execute("UPDATE cache SET accessed = 0 "
+                          "WHERE key LIKE '%second'")
+        cache.get('first')
+        for index in range(3):
+            cache.set(f'new{index}', 'x' * 1000)
+
+        total, = cache._db.execute(
+            'SELECT total FROM cache_size').fetchone()
+        self.assertLessEqual(total, 4096)
+        self.assertIsNone(cache.get('second'))
+        self.assertEqual(cache.get('new2'), 'x' * 1000)
+
+
+def _echo(environ, start_response):
+    start_response('201 Created', [('Content-Type', 'text/plain'),
+                                   ('X-Path', environ['PATH_INFO'])])
+    body = environ['wsgi.input'].read()
+    return [environ['REQUEST_METHOD'].encode(), b' ',
+            environ['QUERY_STRING'].encode(), b' ',
+            environ.get('HTTP_X_TOKEN', '').encode(), b' ', body]
+
+
+class WsgiToAsgiTestCase(SimpleTestCase):
+    """Класс для проверки ASGI-обёртки над WSGI-приложением."""
+
+    def call(self, scope, chunks):
+        messages = [{'type': 'http.request', 'body': chunk,
+                     'more_body': index < len(chunks) - 1}
+                    for index, chunk in enumerate(chunks)]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(WsgiToAsgi(_echo, max_workers=2)(scope, receive, send))
+        return sent
+
+    def test_request_passes_through(self):
+        start, body = self.call(
+            {'type': 'http', 'method': 'POST', 'path': '/app/echo/',
+             'root_path': '/app', 'query_string': b'page=2',
+             'headers': [(b'x-token', b'secret'),
+                         (b'content-type', b'text/plain')]},
+            [b'hello, ', b'world'])
+
+        self.assertEqual(start['status'], 201)
+        self.assertIn((b'x-path', b'/echo/'), start['headers'])
+        self.assertEqual(body['body'], b'POST page=2 secret hello, world')
+
+    def test_disconnect_aborts_request(self):
+        calls = []
+
+        def app(environ, start_response):
+            calls.append(environ)
+            return _echo(environ, start_response)
+
+        messages = [{'type': 'http.request', 'body': b'text=half',
+                     'more_body': True},
+                    {'type': 'http.disconnect'}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(WsgiToAsgi(app)(
+            {'type': 'http', 'method': 'POST', 'path': '/create/'},
+            receive, send))
+
+        self.assertEqual((calls, sent), ([], []))
+
+    def test_lifespan(self):
+        messages = [{'type': 'lifespan.startup'},
+                    {'type': 'lifespan.shutdown'}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        asyncio.run(WsgiToAsgi(_echo)({'type': 'lifespan'}, receive, send))
+
+        self.assertEqual(sent, ['lifespan.startup.complete',
+                                'lifespan.shutdown.complete'])
+
+
+class SQLitePragmasTestCase(TestCase):
+    """Класс для проверки настройки соединений SQLite."""
+
+    def pragma(self, cursor, name):
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
+
+    def test_connection_is_configured(self):
+        with connection.cursor() as cursor:
+            self.assertEqual(self.pragma(cursor, 'busy_timeout'),
+                             settings.SQLITE_PRAGMAS['busy_timeout'])
+            self.assertEqual(self.pragma(cursor, 'cache_size'),
+                             settings.SQLITE_PRAGMAS['cache_size'])
+            # synchronous=NORMAL.
+            self.assertEqual(self.pragma(cursor, 'synchronous'), 1)
+
+    def test_file_database_switches_to_wal(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        db = sqlite3.connect(os.path.join(directory, 'db.sqlite3'))
+        self.addCleanup(db.close)
+
+        apply_pragmas(db.cursor())
+
+        self.assertEqual(self.pragma(db.cursor(), 'journal_mode'), 'wal')
+
+    def test_transactions_take_write_lock_at_begin(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        path = os.path.join(directory, 'db.sqlite3')
+        wrapper = DatabaseWrapper(dict(connection.settings_dict, NAME=path))
+        self.addCleanup(wrapper.close)
+        other = sqlite3.connect(path, timeout=0, isolation_level=None)
+        self.addCleanup(other.close)
+
+        wrapper._start_transaction_under_autocommit()
+
+        # Второй писатель не может начать запись, пока идёт транзакция.
+        with self.assertRaisesMessage(sqlite3.OperationalError, 'locked'):
+            other.execute('BEGIN IMMEDIATE')
+
+
+@mock.patch('core.routers.available_replicas', lambda: ['replica'])
+class ReplicaRouterTestCase(SimpleTestCase):
+    """Класс для проверки чтения с реплик и закрепления после записи."""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def serve(self, request, write=False):
+        seen = {}
+
+        def view(request):
+            seen['read'] = router.db_for_read(Post)
+            if write:
+                router.db_for_write(Post)
+                seen['after_write'] = router.db_for_read(Post)
+            return HttpResponse()
+
+        response = ReplicaPinMiddleware(view)(request)
+        self.seen = seen
+        return seen['read'], response
+
+    def test_reads_from_replica(self):
+        read, response = self.serve(self.factory.get('/'))
+
+        self.assertEqual(read, 'replica')
+        self.assertNotIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+        self.assertEqual(router.db_for_write(User), 'default')
+
+    def test_write_pins_browser_to_primary(self):
+        _, response = self.serve(self.factory.get('/follow/'), write=True)
+        # Запрос, который уже писал, и сам читает с основной базы.
+        self.assertEqual(self.seen['after_write'], 'default')
+        cookie = response.cookies[settings.REPLICA_PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], settings.REPLICA_PIN_SECONDS)
+
+        request = self.factory.get('/')
+        request.COOKIES[settings.REPLICA_PIN_COOKIE] = cookie.value
+        read, _ = self.serve(request)
+
+        self.assertEqual(read, 'default')
+
+    def test_unsafe_methods_read_from_primary(self):
+        read, _ = self.serve(self.factory.post('/create/'))
+
+        self.assertEqual(read, 'default')
+
+    def test_sessions_and_users_read_from_primary(self):
+        def view(request):
+            self.reads = [router.db_for_read(model)
+                          for model in (Session, User)]
+            return HttpResponse()
+
+        ReplicaPinMiddleware(view)(self.factory.get('/'))
+
+        self.assertEqual(self.reads, ['default', 'default'])
+
+    def test_reads_outside_requests_use_primary(self):
+        # Команды и потоки пула вне запроса читают с основной базы.
+        reads = []
+        thread = threading.Thread(
+            target=lambda: reads.append(router.db_for_read(Post)))
+        thread.start()
+        thread.join()
+        self.serve(self.factory.get('/'))
+
+        self.assertEqual(reads, ['default'])
+        self.assertEqual(router.db_for_read(Post), 'default')
+
+    def test_test_mirror_is_not_a_replica(self):
+        # Декоратор класса подменяет функцию в core.routers, а не здесь.
+        self.assertEqual(available_replicas(), [])
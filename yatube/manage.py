@@ -5,7 +5,11 @@ import sys
 
 
 def main():
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    # manage.py test — с настройками для тестов (yatube.test_settings).
+    testing = sys.argv[1:2] == ['test']
+    os.environ.setdefault(
+        'DJANGO_SETTINGS_MODULE',
+        'yatube.test_settings' if testing else 'yatube.settings')
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc:
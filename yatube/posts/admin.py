@@ -1,20 +1,32 @@
 from django.contrib import admin
 
+from . import search
 from .models import Comment, Follow, Group, Post
 
 
-class PostAdmin(admin.ModelAdmin):
+class SearchIndexMixin:
+    """Поиск в админке по полнотекстовому индексу вместо LIKE '%q%'."""
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        return self.search_filter(queryset, search_term), False
+
+
+class PostAdmin(SearchIndexMixin, admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
     list_editable = ('group',)
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
+    search_filter = staticmethod(search.filter_posts)
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(SearchIndexMixin, admin.ModelAdmin):
     list_display = ('pk', 'text', 'post', 'author', 'created')
     search_fields = ('text',)
     list_filter = ('created', )
+    search_filter = staticmethod(search.filter_comments)
 
 
 admin.site.register(Post, PostAdmin)
@@ -0,0 +1,333 @@
+"""Сценарии для команды `python manage.py benchmark <name>`.
+
+Каждый сценарий — функция (stdout, options), зарегистрированная
+декоратором benchmark; результаты печатаются таблицей.
+"""
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+import timeit
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from core.cache import SQLiteCache
+from django.conf import settings
+from django.core.cache import cache as default_cache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from django.db import OperationalError, connection, connections
+from django.core.paginator import Paginator
+from django.template import Context, Template
+from django.template.loader import render_to_string
+from django.test import RequestFactory, override_settings
+from django.utils import timezone
+
+from . import cards, generations, recommendations
+from .models import Comment, Group, Post, PostStats, User
+from .search import FTS_TOKENIZE
+from .utils import page_window
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+def measure(func, repeat):
+    """Лучшее время одного вызова func в миллисекундах."""
+    return min(timeit.repeat(func, number=1, repeat=repeat)) * 1000
+
+
+def write_table(stdout, header, rows):
+    stdout.write(' | '.join(f'{title:>14}' for title in header))
+    for row in rows:
+        stdout.write(' | '.join(
+            f'{value:>14.3f}' if isinstance(value, float) else f'{value:>14}'
+            for value in row))
+
+
+# Шаблон пагинатора до оконного page_range: ссылка на каждую страницу.
+FULL_RANGE_PAGINATOR = Template('''
+{% for i in page_obj.paginator.page_range %}
+  {% if page_obj.number == i %}
+  <li class="page-item active"><span class="page-link">{{ i }}</span></li>
+  {% else %}
+  <li class="page-item">
+    <a class="page-link" href="?page={{ i }}">{{ i }}</a>
+  </li>
+  {% endif %}
+{% endfor %}''')
+
+
+@benchmark('paginator')
+def paginator_render(stdout, options):
+    """Время рендера пагинатора в середине ленты из N постов."""
+    factory = RequestFactory()
+    rows = []
+    for count in (1_000, 10_000, 100_000, 1_000_000):
+        paginator = Paginator(range(count), settings.COUNT_POSTS)
+        page_obj = paginator.page(paginator.num_pages // 2)
+        request = factory.get('/', {'page': page_obj.number})
+        page_obj.first_query = page_obj.previous_query = ''
+        page_obj.next_query = page_obj.last_query = ''
+        page_obj.page_window = page_window(request, page_obj.number,
+                                           paginator.num_pages)
+        context = {'page_obj': page_obj}
+        full = measure(
+            lambda: FULL_RANGE_PAGINATOR.render(Context(context)),
+            options['repeat'])
+        windowed = measure(
+            lambda: render_to_string('posts/includes/paginator.html',
+                                     context),
+            options['repeat'])
+        rows.append((count, full, windowed))
+    write_table(stdout, ('posts', 'full, ms', 'windowed, ms'), rows)
+
+
+@benchmark('cache')
+def cache_hit(stdout, options):
+    """Время чтения фрагмента ленты из кэша для разных бэкендов."""
+    directory = tempfile.mkdtemp()
+    backends = (
+        ('locmem', LocMemCache('benchmark', {})),
+        ('filebased', FileBasedCache(os.path.join(directory, 'files'), {})),
+        ('sqlite', SQLiteCache(os.path.join(directory, 'cache.sqlite3'),
+                               {})),
+    )
+    rows = []
+    try:
+        for size in (1_000, 10_000, 100_000):
+            fragment = 'x' * size
+            row = [size]
+            for _, cache in backends:
+                cache.set('fragment', fragment)
+                row.append(measure(lambda: cache.get('fragment'),
+                                   options['repeat']))
+            rows.append(row)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    write_table(stdout, ('bytes', *(f'{name}, ms' for name, _ in backends)),
+                rows)
+
+
+@benchmark('search')
+def search_query(stdout, options):
+    """LIKE '%q%' против FTS5 MATCH: первая страница результатов поиска."""
+    rng = random.Random(0)
+    words = [f'слово{index}' for index in range(20_000)]
+    db = sqlite3.connect(':memory:')
+    db.execute('CREATE TABLE post (id INTEGER PRIMARY KEY, text TEXT)')
+    db.execute('CREATE VIRTUAL TABLE post_search USING fts5('
+               f"text, tokenize='{FTS_TOKENIZE}')")
+    rows, total = [], 0
+    for count in (10_000, 100_000, 1_000_000):
+        batch = [(total + index, ' '.join(rng.choices(words, k=12)))
+                 for index in range(1, count - total + 1)]
+        total = count
+        db.executemany('INSERT INTO post VALUES (?, ?)', batch)
+        db.executemany('INSERT INTO post_search (rowid, text) '
+                       'VALUES (?, ?)', batch)
+        row = [count]
+        # Частое слово (LIKE остановится на первой странице) и слово,
+        # которого нет (LIKE просмотрит всю таблицу).
+        for word in ('слово42', 'опечатка'):
+            row.append(measure(lambda: db.execute(
+                'SELECT id FROM post WHERE text LIKE ? '
+                'ORDER BY id DESC LIMIT ?',
+                (f'%{word}%', settings.COUNT_POSTS + 1)).fetchall(),
+                options['repeat']))
+            row.append(measure(lambda: db.execute(
+                'SELECT rowid FROM post_search WHERE post_search MATCH ? '
+                'ORDER BY rank LIMIT ?',
+                (f'"{word}"', settings.COUNT_POSTS + 1)).fetchall(),
+                options['repeat']))
+        rows.append(row)
+    write_table(stdout, ('posts', 'LIKE, ms', 'FTS5, ms',
+                         'LIKE miss, ms', 'FTS5 miss, ms'), rows)
+
+
+# Лента до posts.cards: каждая карточка рендерится на каждый показ.
+INLINE_CARDS = Template('''
+{% for post in page_obj %}
+  {% include 'posts/includes/post_card.html' %}
+  {% if not forloop.last %}<hr>{% endif %}
+{% endfor %}''')
+CACHED_CARDS = Template('''{% load post_cards %}
+{% post_cards page_obj as cards %}
+{% for card in cards %}
+  {{ card }}
+  {% if not forloop.last %}<hr>{% endif %}
+{% endfor %}''')
+
+
+def _page_posts(count):
+    # Несохранённые посты с id, которых нет в базе: шаблону хватает полей.
+    start = 10 ** 9
+    author = User(pk=start, username='benchmark', first_name='Анна',
+                  last_name='Замерова')
+    group = Group(pk=start, title='Замеры', slug='benchmark')
+    posts = []
+    for index in range(count):
+        post = Post(pk=start + index, author=author, group=group,
+                    text='Текст поста для замера. ' * 20,
+                    pub_date=timezone.now())
+        post.stats = PostStats(post=post, comments_count=index)
+        posts.append(post)
+    return posts
+
+
+@benchmark('cards')
+def card_render(stdout, options):
+    """Рендер страницы ленты: цикл по постам против кэша карточек."""
+    rows = []
+    for count in (10, 50, 100):
+        posts = _page_posts(count)
+        context = Context({'page_obj': posts})
+        versions = generations.values(
+            *{scope for post in posts for scope in cards.scopes(post)})
+        keys = [cards.make_key(post, versions) for post in posts]
+
+        def cold():
+            default_cache.delete_many(keys)
+            CACHED_CARDS.render(context)
+
+        inline = measure(lambda: INLINE_CARDS.render(context),
+                         options['repeat'])
+        first = measure(cold, options['repeat'])
+        cached = measure(lambda: CACHED_CARDS.render(context),
+                         options['repeat'])
+        default_cache.delete_many(keys)
+        rows.append((count, inline, first, cached))
+    write_table(stdout, ('posts', 'inline, ms', 'cards cold, ms',
+                         'cards warm, ms'), rows)
+
+
+# Варианты основной базы для sqlite-writes: движок, PRAGMA и постоянные
+# соединения. default — как до настройки, pragmas — только PRAGMA,
+# immediate — как в settings (ещё и BEGIN IMMEDIATE из core.sqlite3).
+WRITE_DATABASES = (
+    ('default', 'django.db.backends.sqlite3', False),
+    ('pragmas', 'django.db.backends.sqlite3', True),
+    ('immediate', 'core.sqlite3', True),
+)
+
+
+@contextmanager
+def _database(path, engine, max_age):
+    """Временно подменяет основную базу файлом path со схемой проекта."""
+    original = connections.databases['default']
+    connections.databases['default'] = dict(
+        original, ENGINE=engine, NAME=path, CONN_MAX_AGE=max_age)
+    connection.close()
+    del connections['default']
+    try:
+        call_command('migrate', verbosity=0)
+        yield
+    finally:
+        connection.close()
+        del connections['default']
+        connections.databases['default'] = original
+
+
+def _write_comments(writers, writes, max_age):
+    """writers потоков по writes комментариев через ORM и сигналы."""
+    author = User.objects.create(username='benchmark')
+    posts = [Post.objects.create(text='Пост', author=author)
+             for _ in range(10)]
+
+    def request(index):
+        start = time.perf_counter()
+        try:
+            Comment.objects.create(post=posts[index % len(posts)],
+                                   author=author, text='Комментарий')
+        except OperationalError:
+            return None
+        finally:
+            if not max_age:
+                # Как без CONN_MAX_AGE: новое соединение на каждый запрос.
+                connection.close()
+        return time.perf_counter() - start
+
+    def close(_):
+        connection.close()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(writers) as pool:
+        latencies = list(pool.map(request, range(writers * writes)))
+        list(pool.map(close, range(writers)))
+    elapsed = time.perf_counter() - start
+    done = sorted(latency for latency in latencies if latency is not None)
+    return (len(done) / elapsed,
+            done[int((len(done) - 1) * 0.99)] * 1000 if done else 0.0,
+            len(latencies) - len(done))
+
+
+@benchmark('sqlite-writes')
+def sqlite_writes(stdout, options):
+    """Конкурентные комментарии (ORM, сигналы, счётчики) во временной
+    базе: SQLite по умолчанию, с SQLITE_PRAGMAS и с BEGIN IMMEDIATE."""
+    directory = tempfile.mkdtemp()
+    rows = []
+    try:
+        for writers in (1, 4, 16):
+            for name, engine, tuned in WRITE_DATABASES:
+                path = os.path.join(directory, f'{name}{writers}.sqlite3')
+                pragmas = settings.SQLITE_PRAGMAS if tuned else {}
+                max_age = settings.DATABASES['default'][
+                    'CONN_MAX_AGE'] if tuned else 0
+                with override_settings(SQLITE_PRAGMAS=pragmas), \
+                        _database(path, engine, max_age):
+                    rows.append((writers, name, *_write_comments(
+                        writers, 30, max_age)))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    write_table(stdout, ('writers', 'database', 'writes/s', 'p99, ms',
+                         'errors'), rows)
+
+
+def _follow_edges(count, users, rng):
+    """count случайных подписок; популярность авторов — по закону Ципфа."""
+    cum_weights, total = [], 0
+    for rank in range(users):
+        total += 1 / (rank + 1)
+        cum_weights.append(total)
+    pairs = set()
+    while len(pairs) < count:
+        readers = rng.choices(range(users), k=count)
+        authors = rng.choices(range(users), cum_weights=cum_weights,
+                              k=count)
+        pairs.update(reader * users + author
+                     for reader, author in zip(readers, authors)
+                     if reader != author)
+    return [divmod(pair, users) for pair in list(pairs)[:count]]
+
+
+@benchmark('recommend')
+def recommend(stdout, options):
+    """Полный пересчёт «Кого почитать» в памяти, без чтения из базы."""
+    rng = random.Random(0)
+    rows = []
+    for count, users in ((10_000, 1_000), (100_000, 5_000),
+                         (1_000_000, 20_000)):
+        edges = _follow_edges(count, users, rng)
+        following = {}
+        for user_id, author_id in edges:
+            following.setdefault(user_id, set()).add(author_id)
+        start = time.perf_counter()
+        graph = recommendations.Graph(edges)
+        built = time.perf_counter()
+        for user_id in following:
+            recommendations.suggest(graph, user_id, following[user_id])
+        done = time.perf_counter()
+        rows.append((count, users, built - start, done - built,
+                     (done - built) / len(following) * 1000))
+    write_table(stdout, ('follows', 'users', 'graph, s', 'suggest, s',
+                         'per user, ms'), rows)
@@ -0,0 +1,57 @@
+"""Карточки постов, отрендеренные один раз для всех лент.
+
+Карточка — разметка поста в ленте (posts/includes/post_card.html): автор,
+дата, картинка, текст, ссылка на группу. Она одинакова в главной ленте,
+ленте группы, профиле, подписках и поиске и хранится в кэше под ключом
+из id поста и версии — поколений карточки, автора и группы
+(posts.generations). Правка поста, комментарий, готовая миниатюра, новое
+имя автора или переименование группы меняют версию, и старая карточка
+просто перестаёт читаться. Страница ленты собирается одним get_many.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+from . import generations, thumbnails, variants
+
+TEMPLATE = 'posts/includes/post_card.html'
+
+
+def scopes(post):
+    scopes = [generations.card(post.pk), generations.user(post.author_id)]
+    if post.group_id:
+        scopes.append(generations.group_info(post.group_id))
+    return scopes
+
+
+def page_scopes(posts):
+    """Области всех карточек страницы для версии фрагмента ленты."""
+    return sorted({scope for post in posts for scope in scopes(post)})
+
+
+def make_key(post, versions):
+    version = '.'.join(str(versions[scope]) for scope in scopes(post))
+    return f'post-card:{post.pk}:{version}'
+
+
+def render(posts):
+    """HTML карточек posts в том же порядке.
+
+    Рендерятся только карточки, которых нет в кэше; картинки для них
+    проставляются теми же пакетными запросами, что раньше для страницы.
+    """
+    posts = list(posts)
+    versions = generations.values(
+        *{scope for post in posts for scope in scopes(post)})
+    keys = [make_key(post, versions) for post in posts]
+    cards = cache.get_many(keys)
+    missing = [(post, key) for post, key in zip(posts, keys)
+               if key not in cards]
+    if missing:
+        resolved = variants.resolve(post for post, _ in missing)
+        thumbnails.resolve([post for post in resolved if not post.variants])
+        rendered = {key: render_to_string(TEMPLATE, {'post': post})
+                    for post, key in missing}
+        cache.set_many(rendered, settings.POST_CARD_TIMEOUT)
+        cards.update(rendered)
+    return [cards[key] for key in keys]
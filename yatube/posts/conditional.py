@@ -0,0 +1,42 @@
+"""Условные GET (ETag, Last-Modified, 304) для лент и страницы поста.
+
+Валидаторы считаются без рендера шаблона. ETag — хэш адреса страницы,
+пользователя, поколений её областей (posts.generations) и нескольких
+значений, которые поколения не покрывают. Last-Modified — время
+последнего изменения этих областей. Дата публикации последнего поста
+для него не годится: правка поста или новый комментарий её не меняют.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from . import generations
+
+
+def make_etag(request, scopes, extra=()):
+    parts = [request.get_full_path(), request.user.pk,
+             generations.get(*scopes), *extra]
+    digest = hashlib.md5(':'.join(map(str, parts)).encode()).hexdigest()
+    # Слабый: разметка та же, но csrf-токен в формах каждый раз новый.
+    return 'W/' + quote_etag(digest)
+
+
+def respond(request, scopes, page, extra=()):
+    """Ответ на GET страницы областей scopes: 304 или page().
+
+    page() рендерит страницу и вызывается, только если у клиента нет
+    актуальной версии; extra — значения страницы вне поколений.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return page()
+    etag = make_etag(request, scopes, extra)
+    last_modified = int(generations.modified(*scopes))
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = page()
+    if response.status_code in (200, 304):
+        response.setdefault('ETag', etag)
+        response.setdefault('Last-Modified', http_date(last_modified))
+    return response
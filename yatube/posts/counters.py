@@ -0,0 +1,79 @@
+from django.db import transaction
+from django.db.models import Count, F
+
+from .models import Comment, Follow, Post, PostStats, User, UserStats
+
+
+def bump(model, pk, field, delta):
+    """Атомарно меняет счётчик field строки статистики с ключом pk.
+
+    Строка создаётся при первом увеличении; уменьшение отсутствующей
+    строки или нулевого счётчика ничего не делает — такой дрейф
+    исправляет команда reconcile_counters.
+    """
+    bump_many(model, [pk], field, delta)
+
+
+def bump_many(model, pks, field, delta):
+    """bump для нескольких строк статистики за два запроса.
+
+    Оба запроса пишут: транзакция не начинается с чтения, которое
+    пришлось бы повышать до записи под чужой блокировкой.
+    """
+    with transaction.atomic():
+        if delta > 0:
+            model.objects.bulk_create([model(pk=pk) for pk in pks],
+                                      ignore_conflicts=True)
+        rows = model.objects.filter(pk__in=pks)
+        if delta < 0:
+            rows = rows.filter(**{f'{field}__gte': -delta})
+        rows.update(**{field: F(field) + delta})
+
+
+def user_stats(user):
+    """Счётчики пользователя; для новых пользователей — нули."""
+    return UserStats.objects.filter(pk=user.pk).first() or UserStats(
+        user=user)
+
+
+def post_stats(post):
+    """Счётчики поста; для постов без комментариев — нули."""
+    return PostStats.objects.filter(pk=post.pk).first() or PostStats(
+        post=post)
+
+
+def _actual(rows, field):
+    return dict(
+        rows.order_by().values_list(field).annotate(n=Count('pk')))
+
+
+def reconcile():
+    """Пересчитывает счётчики агрегатами и чинит расхождения.
+
+    Возвращает число исправленных строк.
+    """
+    fixed = 0
+    posts = _actual(Post.objects.all(), 'author')
+    followers = _actual(Follow.objects.all(), 'author')
+    following = _actual(Follow.objects.all(), 'user')
+    stored = {stats.pk: stats for stats in UserStats.objects.all()}
+    for user_id in User.objects.values_list('pk', flat=True).iterator():
+        actual = {
+            'posts_count': posts.get(user_id, 0),
+            'followers_count': followers.get(user_id, 0),
+            'following_count': following.get(user_id, 0),
+        }
+        stats = stored.get(user_id)
+        current = stats and {name: getattr(stats, name) for name in actual}
+        if current != actual and (stats or any(actual.values())):
+            UserStats.objects.update_or_create(pk=user_id, defaults=actual)
+            fixed += 1
+    comments = _actual(Comment.objects.filter(post__isnull=False), 'post')
+    stored = dict(PostStats.objects.values_list('pk', 'comments_count'))
+    for post_id in Post.objects.values_list('pk', flat=True).iterator():
+        actual = comments.get(post_id, 0)
+        if stored.get(post_id, 0) != actual:
+            PostStats.objects.update_or_create(
+                pk=post_id, defaults={'comments_count': actual})
+            fixed += 1
+    return fixed
@@ -0,0 +1,117 @@
+from itertools import groupby
+from operator import attrgetter, itemgetter
+
+from django.conf import settings
+
+from .models import Follow, Inbox, Post, UserStats
+from .utils import FeedSource
+
+BATCH_SIZE = 500
+
+
+def is_pulled(author_id):
+    """Посты автора с большим числом подписчиков читаются при показе."""
+    return UserStats.objects.filter(
+        pk=author_id,
+        followers_count__gt=settings.FEED_PULL_THRESHOLD,
+    ).exists()
+
+
+def pulled_authors(user):
+    """id авторов из подписок user, чьи посты не раскладываются по лентам."""
+    return list(Follow.objects.filter(
+        user=user,
+        author__stats__followers_count__gt=settings.FEED_PULL_THRESHOLD,
+    ).values_list('author_id', flat=True))
+
+
+def follow_sources(user):
+    """Источники ленты подписок: строки Inbox и посты «тяжёлых» авторов.
+
+    Источники не пересекаются: строки Inbox «тяжёлых» авторов, оставшиеся
+    с тех пор, как подписчиков было меньше порога, пропускаются.
+    """
+    pulled = pulled_authors(user)
+    entries = user.inbox.for_feed()
+    if not pulled:
+        return [FeedSource('push', entries, ('pub_date', 'post_id'),
+                           item=attrgetter('post'))]
+    return [
+        FeedSource('push', entries.exclude(author_id__in=pulled),
+                   ('pub_date', 'post_id'), item=attrgetter('post')),
+        FeedSource('pull',
+                   Post.objects.for_feed().filter(author_id__in=pulled)),
+    ]
+
+
+def _bulk_insert(entries):
+    Inbox.objects.bulk_create(entries, batch_size=BATCH_SIZE,
+                              ignore_conflicts=True)
+
+
+def push_post(post):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    if is_pulled(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id).values_list('user_id', flat=True)
+    _bulk_insert(
+        Inbox(user_id=user_id, post_id=post.pk, author_id=post.author_id,
+              pub_date=post.pub_date)
+        for user_id in followers.iterator()
+    )
+
+
+def backfill(user_id, author_ids):
+    """Добавляет в ленту подписчика все посты авторов author_ids."""
+    pulled = set(UserStats.objects.filter(
+        pk__in=author_ids,
+        followers_count__gt=settings.FEED_PULL_THRESHOLD,
+    ).values_list('pk', flat=True))
+    posts = Post.objects.filter(
+        author_id__in=set(author_ids) - pulled,
+    ).values_list('pk', 'author_id', 'pub_date')
+    _bulk_insert(
+        Inbox(user_id=user_id, post_id=post_id, author_id=author_id,
+              pub_date=pub_date)
+        for post_id, author_id, pub_date in posts.iterator()
+    )
+
+
+def settle(author_ids):
+    """Раскладывает по лентам посты авторов, опустившихся до порога.
+
+    Пока у автора было больше FEED_PULL_THRESHOLD подписчиков, его посты
+    не раскладывались, а новые подписчики не получали backfill. После
+    отписки, вернувшей счётчик к порогу, ленты его подписчиков
+    дополняются всеми постами автора.
+    """
+    dropped = UserStats.objects.filter(
+        pk__in=author_ids,
+        followers_count=settings.FEED_PULL_THRESHOLD,
+    ).values_list('pk', flat=True)
+    for author_id in dropped:
+        posts = list(Post.objects.filter(author_id=author_id).values_list(
+            'pk', 'pub_date'))
+        followers = Follow.objects.filter(
+            author_id=author_id).values_list('user_id', flat=True)
+        _bulk_insert(
+            Inbox(user_id=user_id, post_id=post_id, author_id=author_id,
+                  pub_date=pub_date)
+            for user_id in followers.iterator()
+            for post_id, pub_date in posts
+        )
+
+
+def trim(user_id, author_ids):
+    """Убирает из ленты подписчика посты авторов author_ids."""
+    Inbox.objects.filter(user_id=user_id, author_id__in=author_ids).delete()
+
+
+def rebuild():
+    """Пересобирает ленты подписок всех пользователей с нуля."""
+    Inbox.objects.all().delete()
+    follows = Follow.objects.order_by('user_id').values_list(
+        'user_id', 'author_id')
+    for user_id, rows in groupby(follows.iterator(), itemgetter(0)):
+        backfill(user_id, [author_id for _, author_id in rows])
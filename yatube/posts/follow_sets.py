@@ -0,0 +1,47 @@
+"""Множества подписок пользователей для проверок «подписан ли».
+
+id авторов, на которых подписан пользователь, лежат в кэше
+отсортированным массивом array('q') — по 8 байт на подписку, чтобы
+поместился любой id, который примет база (MAX_ID в follow_bulk), — под
+ключом с поколением его подписок (generations.follow). Подписка
+и отписка меняют поколение, и старый массив просто перестаёт читаться.
+За запрос массив загружается один раз и проверяется как frozenset:
+страница ленты узнаёт подписки на всех авторов без запроса на карточку.
+"""
+from array import array
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import generations
+from .models import Follow
+
+TYPECODE = 'q'
+
+
+def _key(user_id, version):
+    # Тип массива в ключе: массивы другой ширины не прочитаются как свои.
+    return f'follow-set:{TYPECODE}:{user_id}:{version}'
+
+
+def load(user_id):
+    """frozenset id авторов, на которых подписан user_id."""
+    key = _key(user_id, generations.get(generations.follow(user_id)))
+    packed = cache.get(key)
+    if packed is None:
+        packed = array(TYPECODE, Follow.objects.filter(
+            user_id=user_id).order_by('author_id').values_list(
+                'author_id', flat=True)).tobytes()
+        cache.set(key, packed, settings.FOLLOW_SET_TIMEOUT)
+    ids = array(TYPECODE)
+    ids.frombytes(packed)
+    return frozenset(ids)
+
+
+def following(user):
+    """Подписки user; загружаются один раз за запрос."""
+    if not user.is_authenticated:
+        return frozenset()
+    if not hasattr(user, '_following'):
+        user._following = load(user.pk)
+    return user._following
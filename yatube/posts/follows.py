@@ -0,0 +1,110 @@
+"""Подписки и отписки одним запросом к базе.
+
+Подписка — INSERT ... SELECT ... ON CONFLICT DO NOTHING, отписка —
+DELETE; оба с RETURNING, так что в ответ приходят только строки,
+которые действительно появились или исчезли. Счётчики, ленты Inbox
+и поколения меняются ровно для них, без гонки «проверил — вставил».
+Follow, сохранённые или удалённые через ORM (админка, тесты), доходят
+до тех же followed/unfollowed через сигналы.
+
+Без RETURNING (SQLite до 3.35) подписка читает существующие строки
+и вставляет остальные bulk_create(ignore_conflicts=True) в той же
+транзакции, а отписка удаляет строки через ORM.
+"""
+from django.core.exceptions import EmptyResultSet
+from django.db import connection, transaction
+
+from . import counters, feed, generations, recommendations
+from .models import Follow, UserStats
+
+FOLLOW_SQL = (
+    'INSERT INTO {follow} (user_id, author_id) '
+    'SELECT %s, id FROM ({authors}) AS authors WHERE true '
+    'ON CONFLICT DO NOTHING RETURNING author_id')
+UNFOLLOW_SQL = (
+    'DELETE FROM {follow} WHERE user_id = %s AND author_id IN ({authors}) '
+    'RETURNING author_id')
+
+
+def _has_returning():
+    return (connection.vendor == 'sqlite'
+            and connection.Database.sqlite_version_info >= (3, 35))
+
+
+def _execute(template, user, authors):
+    try:
+        sql, params = authors.values('pk').query.sql_with_params()
+    except EmptyResultSet:
+        # pk__in=[]: Django не строит такой запрос, менять нечего.
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            template.format(follow=Follow._meta.db_table, authors=sql),
+            [user.pk, *params])
+        return [author_id for author_id, in cursor.fetchall()]
+
+
+def follow(user, authors):
+    """Подписывает user на авторов из authors (queryset User).
+
+    Возвращает id авторов, подписка на которых появилась сейчас.
+    """
+    authors = authors.exclude(pk=user.pk)
+    with transaction.atomic():
+        if _has_returning():
+            created = _execute(FOLLOW_SQL, user, authors)
+        else:
+            existing = set(Follow.objects.select_for_update().filter(
+                user=user, author__in=authors).values_list(
+                    'author_id', flat=True))
+            created = [pk for pk in authors.values_list('pk', flat=True)
+                       if pk not in existing]
+            Follow.objects.bulk_create(
+                [Follow(user=user, author_id=pk) for pk in created],
+                ignore_conflicts=True)
+        followed(user.pk, created)
+    return created
+
+
+def unfollow(user, authors):
+    """Отписывает user от авторов из authors; возвращает их id."""
+    with transaction.atomic():
+        if _has_returning():
+            deleted = _execute(UNFOLLOW_SQL, user, authors)
+            unfollowed(user.pk, deleted)
+            return deleted
+        rows = Follow.objects.filter(user=user, author__in=authors)
+        deleted = list(rows.select_for_update().values_list(
+            'author_id', flat=True))
+        # Удаление через ORM само вызовет unfollowed из сигнала.
+        rows.delete()
+    return deleted
+
+
+def followed(user_id, author_ids):
+    """Счётчики, ленты и поколения после новых подписок user_id."""
+    if not author_ids:
+        return
+    counters.bump_many(UserStats, author_ids, 'followers_count', 1)
+    counters.bump(UserStats, user_id, 'following_count', len(author_ids))
+    feed.backfill(user_id, author_ids)
+    _changed(user_id, author_ids)
+    recommendations.followed(user_id, author_ids)
+
+
+def unfollowed(user_id, author_ids):
+    """Счётчики, ленты и поколения после отписок user_id."""
+    if not author_ids:
+        return
+    counters.bump_many(UserStats, author_ids, 'followers_count', -1)
+    counters.bump(UserStats, user_id, 'following_count', -len(author_ids))
+    feed.trim(user_id, author_ids)
+    feed.settle(author_ids)
+    _changed(user_id, author_ids)
+
+
+def _changed(user_id, author_ids):
+    generations.bump(generations.follow(user_id))
+    # Счётчики подписок в профилях изменились: для Last-Modified.
+    generations.touch(generations.author(user_id),
+                      *(generations.author(pk) for pk in author_ids))
@@ -1,4 +1,6 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
+from posts import uploads
 from posts.models import Comment, Post
 
 
@@ -7,6 +9,21 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('text', 'group', 'image',)
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        image = self.files.get(self.add_prefix('image'))
+        if isinstance(image, uploads.RejectedUpload):
+            # Содержимое отброшено ещё при приёме, и ImageField его не
+            # откроет: пусть хотя бы объяснит почему.
+            self.fields['image'].error_messages['invalid_image'] = (
+                image.error)
+
+    def clean_image(self):
+        image = self.cleaned_data['image']
+        if isinstance(image, UploadedFile):
+            return uploads.normalize(image)
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
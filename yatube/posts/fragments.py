@@ -0,0 +1,138 @@
+"""Кэш отрендеренных фрагментов лент с защитой от «стада».
+
+Запись хранит поколение, с которым фрагмент был отрендерен, и живёт в
+кэше на FEED_CACHE_GRACE секунд дольше своего срока. Пересчитывает
+фрагмент только тот воркер, что взял блокировку (cache.add); остальные
+в это время получают устаревшую запись, а если её нет — ждут.
+
+Чтобы свежая запись не истекала у всех разом, пересчёт запускается
+заранее с вероятностью, растущей к концу срока (XFetch): чем дольше
+рендер, тем раньше.
+"""
+import hashlib
+import math
+import random
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Блокировка пересчёта снимается сама, если воркер упал посреди рендера.
+LOCK_TIMEOUT = 30
+# Сколько ждать чужой пересчёт, когда отдать нечего, и как часто проверять.
+LOCK_WAIT = 5.0
+LOCK_POLL = 0.05
+# Множитель XFetch: больше единицы — пересчёт раньше.
+BETA = 1.0
+
+STATS = ('hit', 'miss', 'stale', 'lock_wait')
+# Счётчики копятся в памяти процесса и переносятся в кэш не чаще раза
+# в STATS_FLUSH_INTERVAL секунд: запись в общий кэш на каждое попадание
+# (в SQLiteCache — транзакция) съела бы выигрыш от самого попадания.
+STATS_FLUSH_INTERVAL = 10
+
+_counts = Counter()
+_lock = threading.Lock()
+_flushed = time.monotonic()
+
+
+def _stat_key(name):
+    return f'feed-stats:{name}'
+
+
+def count(name):
+    with _lock:
+        _counts[name] += 1
+        due = time.monotonic() - _flushed >= STATS_FLUSH_INTERVAL
+    if due:
+        flush_stats()
+
+
+def flush_stats():
+    """Переносит счётчики процесса в общий кэш."""
+    global _flushed
+    with _lock:
+        pending = dict(_counts)
+        _counts.clear()
+        _flushed = time.monotonic()
+    for name, value in pending.items():
+        key = _stat_key(name)
+        try:
+            cache.incr(key, value)
+        except ValueError:
+            if not cache.add(key, value, None):
+                cache.incr(key, value)
+
+
+def stats():
+    """Счётчики попаданий, промахов, устаревших ответов и ожиданий."""
+    flush_stats()
+    values = cache.get_many([_stat_key(name) for name in STATS])
+    return {name: values.get(_stat_key(name), 0) for name in STATS}
+
+
+def reset_stats():
+    with _lock:
+        _counts.clear()
+    cache.delete_many([_stat_key(name) for name in STATS])
+
+
+def make_key(name, vary_on=()):
+    digest = hashlib.md5(':'.join(map(str, vary_on)).encode()).hexdigest()
+    return f'feed-page:{name}:{digest}'
+
+
+def _is_fresh(entry, version, now):
+    entry_version, _, expires, delta = entry
+    if entry_version != version:
+        return False
+    return now - delta * BETA * math.log(1 - random.random()) < expires
+
+
+def _render(key, version, render, timeout):
+    start = time.time()
+    html = render()
+    now = time.time()
+    cache.set(key, (version, html, now + timeout, now - start),
+              timeout + settings.FEED_CACHE_GRACE)
+    return html
+
+
+def _wait(key, version):
+    deadline = time.time() + LOCK_WAIT
+    while time.time() < deadline:
+        time.sleep(LOCK_POLL)
+        entry = cache.get(key)
+        if entry is not None and entry[0] == version:
+            return entry
+    return None
+
+
+def get_or_render(key, version, render, timeout=None):
+    """HTML фрагмента key поколения version; render() строит его заново."""
+    if timeout is None:
+        timeout = settings.FEED_CACHE_TIMEOUT
+    entry = cache.get(key)
+    if entry is not None and _is_fresh(entry, version, time.time()):
+        count('hit')
+        return entry[1]
+    lock = f'{key}:lock'
+    if cache.add(lock, 1, LOCK_TIMEOUT):
+        count('miss')
+        try:
+            return _render(key, version, render, timeout)
+        finally:
+            cache.delete(lock)
+    if entry is not None:
+        # Пересчёт уже идёт в другом воркере: отдаём что есть.
+        fresh = entry[0] == version and time.time() < entry[2]
+        count('hit' if fresh else 'stale')
+        return entry[1]
+    count('lock_wait')
+    entry = _wait(key, version)
+    if entry is not None:
+        return entry[1]
+    # Пересчёт затянулся: рендерим сами, не дожидаясь блокировки.
+    return _render(key, version, render, timeout)
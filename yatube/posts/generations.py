@@ -0,0 +1,186 @@
+"""Счётчики поколений лент для ключей кэша фрагментов.
+
+Поколение области (вся лента, группа, автор, подписки пользователя)
+увеличивается сигналами при каждом изменении её содержимого, а ключ
+кэша фрагмента включает текущие поколения. Поэтому фрагменты можно
+хранить долго: после изменения старые ключи просто перестают читаться.
+
+Рядом хранится время последнего изменения области — для Last-Modified
+условных GET (posts.conditional).
+
+Пока реплики (core.routers) не догнали основную базу, фрагмент можно
+собрать по устаревшим данным и положить в кэш уже под новым
+поколением. Поэтому при настроенных репликах bump пишет области в
+журнал, а команда replicate после копирования базы повторяет их bump.
+"""
+import random
+import time
+
+from core.routers import available_replicas
+from django.conf import settings
+from django.core.cache import cache
+
+INDEX = 'index'
+LOG_POSITION = 'feed-gen-log'
+LOG_REPLAYED = 'feed-gen-log-replayed'
+
+
+def group(group_id):
+    return f'group:{group_id}'
+
+
+def author(author_id):
+    return f'author:{author_id}'
+
+
+def follow(user_id):
+    return f'follow:{user_id}'
+
+
+# Области карточки поста (posts.cards): сам пост, имя автора,
+# название и адрес группы.
+def card(post_id):
+    return f'card:{post_id}'
+
+
+def user(user_id):
+    return f'user:{user_id}'
+
+
+def group_info(group_id):
+    return f'group-info:{group_id}'
+
+
+# Любое новое имя автора или название группы: для ETag лент, набор
+# карточек которых до запроса к базе неизвестен.
+NAMES = 'names'
+
+
+# Рекомендации (posts.recommendations): пересчёт всех и поправки одного.
+SUGGESTIONS = 'suggestions'
+# Списки «Популярного» (posts.trending), пересчитанные командой trending.
+TRENDING = 'trending'
+
+
+def suggestions(user_id):
+    return f'suggestions:{user_id}'
+
+
+def _key(scope):
+    return f'feed-gen:{scope}'
+
+
+def _mtime_key(scope):
+    return f'feed-mtime:{scope}'
+
+
+def _start():
+    # Случайное начало, чтобы после потери счётчика в кэше его новые
+    # значения не совпали со старыми и не подняли устаревшие фрагменты.
+    return random.randrange(1, 2 ** 31)
+
+
+def values(*scopes):
+    """Текущие поколения областей scopes: {область: поколение}."""
+    keys = {_key(scope): scope for scope in scopes}
+    found = cache.get_many(list(keys))
+    for key in keys:
+        if key not in found:
+            cache.add(key, _start(), None)
+            found[key] = cache.get(key)
+    return {scope: found[key] for key, scope in keys.items()}
+
+
+def get(*scopes):
+    """Текущие поколения областей scopes одной строкой."""
+    versions = values(*scopes)
+    return '.'.join(str(versions[scope]) for scope in scopes)
+
+
+def _log_key(position):
+    return f'feed-gen-log:{position}'
+
+
+def _incr(key, start):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, start, None)
+        return cache.incr(key)
+
+
+def bump(*scopes):
+    """Увеличивает поколения областей scopes."""
+    for scope in scopes:
+        _incr(_key(scope), _start())
+    touch(*scopes)
+    if available_replicas():
+        cache.set(_log_key(_incr(LOG_POSITION, 0)), scopes,
+                  settings.FEED_CACHE_TIMEOUT)
+
+
+def log_position():
+    """Номер последней записи журнала bump."""
+    return cache.get(LOG_POSITION, 0)
+
+
+def replay(position):
+    """Повторяет bump записей журнала после прошлого replay до position.
+
+    Возвращает число областей, поколения которых увеличены снова.
+    """
+    replayed = cache.get(LOG_REPLAYED, 0)
+    if replayed > position:
+        # Счётчик журнала потерялся из кэша и начат заново.
+        replayed = 0
+    keys = [_log_key(index) for index in range(replayed + 1, position + 1)]
+    scopes = {scope for logged in cache.get_many(keys).values()
+              for scope in logged}
+    for scope in scopes:
+        _incr(_key(scope), _start())
+    touch(*scopes)
+    cache.set(LOG_REPLAYED, position, None)
+    cache.delete_many(keys)
+    return len(scopes)
+
+
+def touch(*scopes):
+    """Отмечает изменение областей scopes, не сбрасывая их фрагменты."""
+    now = time.time()
+    cache.set_many({_mtime_key(scope): now for scope in scopes}, None)
+
+
+def modified(*scopes):
+    """Время (timestamp) последнего изменения областей scopes.
+
+    Если отметка потерялась из кэша, изменением считается «сейчас»:
+    лишний полный ответ лучше устаревшего 304.
+    """
+    keys = [_mtime_key(scope) for scope in scopes]
+    values = cache.get_many(keys)
+    for key in keys:
+        if key not in values:
+            cache.add(key, time.time(), None)
+            values[key] = cache.get(key) or time.time()
+    return max(values.values())
+
+
+def feed_cache(*scopes, cards=()):
+    """Контекст для {% feedcache %} ленты: имя, время жизни и версия.
+
+    cards — области карточек страницы (posts.cards.page_scopes): новое
+    имя автора или название группы меняет версию фрагмента.
+    """
+    return {
+        'name': '.'.join(scopes),
+        'timeout': settings.FEED_CACHE_TIMEOUT,
+        'version': get(*scopes, *cards),
+    }
+
+
+def post_scopes(post, old_group_id=None):
+    """Области, в ленты которых попадает (или попадал) пост, и его карточка."""
+    scopes = [INDEX, author(post.author_id), card(post.pk)]
+    for group_id in {post.group_id, old_group_id} - {None}:
+        scopes.append(group(group_id))
+    return scopes
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from posts.benchmarks import BENCHMARKS
+
+
+class Command(BaseCommand):
+    help = 'Запускает сценарий нагрузочного замера из posts.benchmarks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=sorted(BENCHMARKS))
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Сколько раз повторять каждый замер.')
+
+    def handle(self, *args, **options):
+        BENCHMARKS[options['name']](self.stdout, options)
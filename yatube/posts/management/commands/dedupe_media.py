@@ -0,0 +1,42 @@
+import os
+
+from django.core.management.base import BaseCommand
+from posts import media, thumbnails
+from posts.models import Post
+from posts.storage import image_storage, is_content_name
+
+
+class Command(BaseCommand):
+    help = ('Переносит картинки постов в хранилище по содержимому, '
+            'пересчитывает ссылки и удаляет файлы без ссылок.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help='Число процессов для новых миниатюр.')
+
+    def handle(self, *args, **options):
+        names = [
+            name for name in Post.objects.exclude(image='')
+            .exclude(image=None).order_by()
+            .values_list('image', flat=True).distinct()
+            if not is_content_name(name)
+        ]
+        moved, missing = {}, 0
+        for name in names:
+            if not image_storage.exists(name):
+                self.stderr.write(f'Нет файла {name}.')
+                missing += 1
+                continue
+            moved[name] = media.dedupe(name)
+        pending = [name for name in set(moved.values())
+                   if not thumbnails.is_built(name)]
+        built = sum(1 for _ in thumbnails.regenerate(
+            pending, options['workers']))
+        fixed = media.recount()
+        collected = media.collect()
+        self.stdout.write(self.style.SUCCESS(
+            f'Перенесено файлов: {len(moved)}, из них уникальных: '
+            f'{len(set(moved.values()))}, не найдено: {missing}, '
+            f'построено миниатюр: {built}. '
+            f'Исправлено счётчиков: {fixed}, удалено файлов без ссылок: '
+            f'{len(collected)}.'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from posts import fragments
+
+
+class Command(BaseCommand):
+    help = 'Показывает счётчики кэша фрагментов лент.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true',
+                            help='Обнулить счётчики после вывода.')
+
+    def handle(self, *args, **options):
+        for name, value in fragments.stats().items():
+            self.stdout.write(f'{name}: {value}')
+        if options['reset']:
+            fragments.reset_stats()
+            self.stdout.write(self.style.SUCCESS('Счётчики обнулены.'))
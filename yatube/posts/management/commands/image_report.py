@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from posts import thumbnails, variants
+from posts.benchmarks import write_table
+from posts.models import Post
+
+# Ширина кадра, который браузер запросит: ПК и телефон 360px при DPR 2.
+CLIENTS = (('desktop', 960), ('mobile', 720))
+
+
+class Command(BaseCommand):
+    help = ('Сколько байт картинок на страницах ленты экономят варианты '
+            'srcset по сравнению с миниатюрой JPEG 960x339.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=5,
+                            help='Сколько первых страниц ленты посчитать.')
+
+    def handle(self, *args, **options):
+        paginator = Paginator(Post.objects.for_feed().exclude(image=''),
+                              settings.COUNT_POSTS)
+        rows = []
+        for number in paginator.page_range[:options['pages']]:
+            posts = variants.resolve(paginator.page(number))
+            thumbnails.resolve(posts)
+            posts = [post for post in posts if post.variants
+                     and not isinstance(post.thumbnail,
+                                        thumbnails.Placeholder)]
+            baseline = sum(default_storage.size(post.thumbnail.name)
+                           for post in posts)
+            row = [number, len(posts), baseline]
+            for _, width in CLIENTS:
+                size = sum(post.variants.best(width).size for post in posts)
+                row += [size, f'{1 - size / baseline:.0%}' if baseline
+                        else '-']
+            rows.append(row)
+        header = ['page', 'images', 'jpeg 960, B']
+        for name, _ in CLIENTS:
+            header += [f'{name}, B', f'{name} saved']
+        write_table(self.stdout, header, rows)
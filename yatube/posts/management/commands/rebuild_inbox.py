@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from posts import feed
+from posts.models import Inbox
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает ленты подписок (Inbox) из Follow и Post.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            feed.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Лента подписок пересобрана: {Inbox.objects.count()} строк.'))
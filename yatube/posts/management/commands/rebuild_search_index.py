@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from posts import search
+
+
+class Command(BaseCommand):
+    help = 'Строит поисковый индекс постов и комментариев с нуля.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            search.rebuild()
+        backend = 'FTS5' if search.use_fts() else 'SearchTerm'
+        self.stdout.write(self.style.SUCCESS(
+            f'Поисковый индекс ({backend}) перестроен.'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from posts import recommendations
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает рекомендации «Кого почитать» для всех '
+            'читателей по графу подписок.')
+
+    def handle(self, *args, **options):
+        rows = recommendations.recompute()
+        self.stdout.write(self.style.SUCCESS(
+            f'Рекомендаций сохранено: {rows}.'))
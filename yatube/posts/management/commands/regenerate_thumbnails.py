@@ -0,0 +1,25 @@
+import os
+
+from django.core.management.base import BaseCommand
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Строит миниатюры картинок всех постов в пуле процессов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help='Число процессов (по умолчанию — по ядрам).')
+        parser.add_argument('--force', action='store_true',
+                            help='Удалить готовые миниатюры и построить '
+                                 'заново.')
+
+    def handle(self, *args, **options):
+        names = list(
+            Post.objects.exclude(image='').exclude(image=None).order_by()
+            .values_list('image', flat=True).distinct())
+        done = sum(1 for _ in thumbnails.regenerate(
+            names, options['workers'], options['force']))
+        self.stdout.write(self.style.SUCCESS(
+            f'Картинок с построенными миниатюрами: {done}.'))
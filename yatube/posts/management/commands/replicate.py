@@ -0,0 +1,45 @@
+import sqlite3
+import time
+from contextlib import closing
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from posts import generations
+
+
+def replicate():
+    """Копирует основную базу во все реплики; возвращает их имена."""
+    source = connections[DEFAULT_DB_ALIAS]
+    # Всё, что записано в журнал до копирования, в копию уже попало.
+    position = generations.log_position()
+    source.ensure_connection()
+    copied = []
+    for alias in settings.DATABASE_REPLICAS:
+        name = connections[alias].settings_dict['NAME']
+        if name == source.settings_dict['NAME']:
+            continue
+        with closing(sqlite3.connect(name)) as target:
+            source.connection.backup(target)
+        copied.append(alias)
+    if copied:
+        generations.replay(position)
+    return copied
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную базу SQLite в реплики из DATABASE_REPLICAS '
+            'и сбрасывает фрагменты, собранные по их устаревшим данным.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0,
+                            help='Повторять каждые N секунд; 0 — один раз.')
+
+    def handle(self, *args, **options):
+        while True:
+            copied = replicate()
+            self.stdout.write(self.style.SUCCESS(
+                f'Обновлено реплик: {len(copied)}.'))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
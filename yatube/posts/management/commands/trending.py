@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает «Популярное»: посты и группы по затухающей '
+            'активности последних интервалов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0,
+                            help='Повторять каждые N секунд; 0 — один раз.')
+
+    def handle(self, *args, **options):
+        while True:
+            posts, groups = trending.refresh()
+            self.stdout.write(self.style.SUCCESS(
+                f'Популярных постов: {posts}, групп: {groups}.'))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,88 @@
+"""Ссылки постов на файлы картинок и сборка мусора.
+
+Картинки лежат в хранилище по содержимому (posts.storage), и один файл
+может быть у многих постов. MediaBlob.refs — сколько постов на него
+ссылается; сигналы поддерживают счётчик при сохранении и удалении
+постов. collect() удаляет файлы без ссылок вместе с миниатюрами и
+вариантами, dedupe() переносит файлы со старыми именами в хранилище
+по содержимому. Обе запускает команда dedupe_media.
+"""
+from django.db.models import Count
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
+
+from . import counters, generations, variants
+from .models import MediaBlob, Post
+from .storage import image_storage
+
+
+def acquire(name):
+    if name:
+        counters.bump(MediaBlob, name, 'refs', 1)
+
+
+def release(name):
+    if name:
+        counters.bump(MediaBlob, name, 'refs', -1)
+
+
+def recount():
+    """Пересчитывает ссылки по постам; отдаёт число исправленных файлов."""
+    actual = dict(
+        Post.objects.exclude(image='').exclude(image=None).order_by()
+        .values_list('image').annotate(refs=Count('pk')))
+    stored = dict(MediaBlob.objects.values_list('name', 'refs'))
+    fixed = 0
+    for name, refs in actual.items():
+        if stored.get(name) != refs:
+            MediaBlob.objects.update_or_create(pk=name,
+                                               defaults={'refs': refs})
+            fixed += 1
+    orphans = [name for name, refs in stored.items()
+               if refs and name not in actual]
+    MediaBlob.objects.filter(pk__in=orphans).update(refs=0)
+    return fixed + len(orphans)
+
+
+def delete(name):
+    """Удаляет файл name, его миниатюры и варианты."""
+    # Миниатюры файлов со старыми именами записаны в kvstore
+    # с хранилищем по умолчанию.
+    for source in (ImageFile(name, image_storage), ImageFile(name)):
+        default.kvstore.delete(source)
+    variants.delete(name)
+    image_storage.delete(name)
+
+
+def collect():
+    """Удаляет файлы, на которые не ссылается ни один пост.
+
+    Не запускать одновременно с загрузками: файл, который только что
+    загрузили ещё раз, но пост с ним пока не сохранён, тоже без ссылок.
+    """
+    names = list(MediaBlob.objects.filter(refs=0)
+                 .values_list('name', flat=True))
+    for name in names:
+        delete(name)
+    MediaBlob.objects.filter(pk__in=names, refs=0).delete()
+    return names
+
+
+def dedupe(name):
+    """Переносит файл name в хранилище по содержимому.
+
+    Посты переключаются на новое имя, старый файл с миниатюрами
+    удаляется. Отдаёт новое имя.
+    """
+    with image_storage.open(name) as file:
+        new_name = image_storage.save(name, file)
+    posts = Post.objects.filter(image=name)
+    scopes = set()
+    for post in posts.only('author', 'group'):
+        scopes.update(generations.post_scopes(post))
+    refs = posts.update(image=new_name)
+    counters.bump(MediaBlob, new_name, 'refs', refs)
+    MediaBlob.objects.filter(pk=name).delete()
+    delete(name)
+    generations.bump(*scopes)
+    return new_name
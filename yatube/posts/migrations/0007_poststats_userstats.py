@@ -0,0 +1,68 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:55
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count
+
+
+def fill_stats(apps, schema_editor):
+    Comment = apps.get_model('posts', 'Comment')
+    Follow = apps.get_model('posts', 'Follow')
+    Post = apps.get_model('posts', 'Post')
+    PostStats = apps.get_model('posts', 'PostStats')
+    UserStats = apps.get_model('posts', 'UserStats')
+
+    def counts(rows, field):
+        return rows.order_by().values_list(field).annotate(n=Count('pk'))
+
+    stats = {}
+    for field, rows, key in (
+            ('posts_count', Post.objects.all(), 'author'),
+            ('followers_count', Follow.objects.all(), 'author'),
+            ('following_count', Follow.objects.all(), 'user')):
+        for user_id, n in counts(rows, key):
+            stats.setdefault(user_id, UserStats(pk=user_id))
+            setattr(stats[user_id], field, n)
+    UserStats.objects.bulk_create(stats.values(), batch_size=500)
+    PostStats.objects.bulk_create(
+        (PostStats(pk=post_id, comments_count=n) for post_id, n in counts(
+            Comment.objects.filter(post__isnull=False), 'post')),
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0006_inbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostStats',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='posts.Post')),
+                ('comments_count', models.PositiveIntegerField(default=0, verbose_name='Комментариев')),
+            ],
+            options={
+                'verbose_name': 'Статистика поста',
+                'verbose_name_plural': 'Статистика постов',
+            },
+        ),
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Постов')),
+                ('followers_count', models.PositiveIntegerField(default=0, verbose_name='Подписчиков')),
+                ('following_count', models.PositiveIntegerField(default=0, verbose_name='Подписок')),
+            ],
+            options={
+                'verbose_name': 'Статистика пользователя',
+                'verbose_name_plural': 'Статистика пользователей',
+            },
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
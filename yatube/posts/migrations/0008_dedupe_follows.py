@@ -0,0 +1,34 @@
+from django.db import migrations
+from django.db.models import Count, F, Min
+
+
+def dedupe_follows(apps, schema_editor):
+    """Оставляет по одной подписке на пару (user, author)."""
+    Follow = apps.get_model('posts', 'Follow')
+    UserStats = apps.get_model('posts', 'UserStats')
+    duplicates = (
+        Follow.objects.values('user', 'author')
+        .annotate(first=Min('pk'), total=Count('pk'))
+        .filter(total__gt=1)
+        .order_by()
+    )
+    for row in list(duplicates):
+        extra = row['total'] - 1
+        Follow.objects.filter(
+            user=row['user'], author=row['author'],
+        ).exclude(pk=row['first']).delete()
+        UserStats.objects.filter(pk=row['author']).update(
+            followers_count=F('followers_count') - extra)
+        UserStats.objects.filter(pk=row['user']).update(
+            following_count=F('following_count') - extra)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_poststats_userstats'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_follows, migrations.RunPython.noop),
+    ]
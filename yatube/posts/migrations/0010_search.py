@@ -0,0 +1,99 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:06
+
+import re
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Копии из posts.search на момент миграции: её результат не должен
+# меняться вместе с модулем.
+WORD_RE = re.compile(r'[^\W_]+')
+YO = str.maketrans('ёЁ', 'еЕ')
+NORMALIZE_SQL = "replace(replace({}, 'ё', 'е'), 'Ё', 'Е')"
+FTS_TOKENIZE = 'unicode61 remove_diacritics 2'
+FILL_POSTS = (
+    'INSERT INTO posts_post_search (rowid, text) '
+    f'SELECT id, {NORMALIZE_SQL.format("text")} FROM posts_post'
+)
+FILL_COMMENTS = (
+    'INSERT INTO posts_comment_search (rowid, text, post_id) '
+    f'SELECT id, {NORMALIZE_SQL.format("text")}, post_id FROM posts_comment'
+)
+
+
+def fts5_available(conn):
+    if conn.vendor != 'sqlite':
+        return False
+    with conn.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return ('ENABLE_FTS5',) in cursor.fetchall()
+
+
+def tokenize(text):
+    return WORD_RE.findall(text.translate(YO).lower())
+
+
+def create_index(apps, schema_editor):
+    """Таблицы FTS5, если они доступны, иначе — строки SearchTerm."""
+    if fts5_available(schema_editor.connection):
+        for sql in (
+            'CREATE VIRTUAL TABLE posts_post_search USING fts5('
+            f"text, tokenize='{FTS_TOKENIZE}')",
+            'CREATE VIRTUAL TABLE posts_comment_search USING fts5('
+            f"text, post_id UNINDEXED, tokenize='{FTS_TOKENIZE}')",
+            FILL_POSTS,
+            FILL_COMMENTS,
+        ):
+            schema_editor.execute(sql)
+        return
+    Comment = apps.get_model('posts', 'Comment')
+    Post = apps.get_model('posts', 'Post')
+    SearchTerm = apps.get_model('posts', 'SearchTerm')
+
+    def terms(text, weight, **fields):
+        counts = {}
+        for term in tokenize(text):
+            counts[term] = counts.get(term, 0) + weight
+        return [SearchTerm(term=term[:64], weight=value, **fields)
+                for term, value in counts.items()]
+
+    for post in Post.objects.iterator():
+        SearchTerm.objects.bulk_create(terms(post.text, 2, post_id=post.pk))
+    for comment in Comment.objects.iterator():
+        SearchTerm.objects.bulk_create(terms(
+            comment.text, 1, post_id=comment.post_id, comment_id=comment.pk))
+
+
+def drop_index(apps, schema_editor):
+    if fts5_available(schema_editor.connection):
+        schema_editor.execute('DROP TABLE posts_post_search')
+        schema_editor.execute('DROP TABLE posts_comment_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='Слово')),
+                ('weight', models.PositiveIntegerField(verbose_name='Вес')),
+                ('comment', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.Comment')),
+                ('post', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.Post')),
+            ],
+            options={
+                'verbose_name': 'Слово поискового индекса',
+                'verbose_name_plural': 'Поисковый индекс',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='searchterm',
+            index=models.Index(fields=['term', 'post'], name='searchterm_term_post_idx'),
+        ),
+        migrations.RunPython(create_index, drop_index),
+    ]
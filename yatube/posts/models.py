@@ -2,8 +2,38 @@ from django.contrib.auth import get_user_model
 from django.db import models
 from django.db.models import UniqueConstraint
 
+from .storage import image_storage
+
 User = get_user_model()
 
+# Поля автора и группы, которые карточка поста в ленте не показывает.
+FEED_DEFERRED = (
+    'author__password',
+    'author__last_login',
+    'author__is_superuser',
+    'author__email',
+    'author__is_staff',
+    'author__is_active',
+    'author__date_joined',
+    'group__description',
+)
+
+
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты для ленты: автор, группа и счётчики в том же запросе."""
+        return self.select_related('author', 'group', 'stats').defer(
+            *FEED_DEFERRED)
+
+
+class InboxQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Строки ленты подписок вместе с постами, авторами и группами."""
+        return self.select_related(
+            'post__author', 'post__group', 'post__stats',
+        ).defer(
+            *(f'post__{field}' for field in FEED_DEFERRED))
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -19,10 +49,12 @@ class Follow(models.Model):
 
     class Meta():
         verbose_name = 'Подписки'
-        UniqueConstraint(
-            fields=['user', 'author'],
-            name='unique_follow'
-        )
+        constraints = [
+            UniqueConstraint(
+                fields=['user', 'author'],
+                name='unique_follow'
+            ),
+        ]
 
 
 class Comment(models.Model):
@@ -48,6 +80,10 @@ class Comment(models.Model):
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(fields=['post', 'created'],
+                         name='comment_post_created_idx'),
+        ]
 
 
 class Group(models.Model):
@@ -89,15 +125,214 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=image_storage,
         blank=True,
         null=True,
         help_text='Добавьте картинку'
     )
 
+    objects = PostQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
         ordering = ['-pub_date', ]
+        indexes = [
+            models.Index(fields=['-pub_date', '-id'],
+                         name='post_pub_date_idx'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_pub_date_idx'),
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_pub_date_idx'),
+        ]
 
     def __str__(self):
         return self.text[:15]
+
+
+class Inbox(models.Model):
+    """Лента подписок: по строке на каждый пост автора для подписчика."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='inbox'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='inbox_entries'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    objects = InboxQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Лента подписок'
+        verbose_name_plural = 'Ленты подписок'
+        ordering = ['-pub_date', '-post']
+        constraints = [
+            UniqueConstraint(fields=['user', 'post'], name='unique_inbox'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-post'],
+                         name='inbox_user_pub_date_idx'),
+            models.Index(fields=['user', 'author'],
+                         name='inbox_user_author_idx'),
+        ]
+
+
+class UserStats(models.Model):
+    """Счётчики пользователя, которые поддерживаются сигналами."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats'
+    )
+    posts_count = models.PositiveIntegerField('Постов', default=0)
+    followers_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписок', default=0)
+
+    class Meta:
+        verbose_name = 'Статистика пользователя'
+        verbose_name_plural = 'Статистика пользователей'
+
+
+class PostStats(models.Model):
+    """Счётчики поста, которые поддерживаются сигналами."""
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats'
+    )
+    comments_count = models.PositiveIntegerField('Комментариев', default=0)
+
+    class Meta:
+        verbose_name = 'Статистика поста'
+        verbose_name_plural = 'Статистика постов'
+
+
+class SearchTerm(models.Model):
+    """Запасной обратный индекс поиска, когда в СУБД нет FTS5.
+
+    Строка — слово поста (comment пуст) или его комментария
+    и его вес: число вхождений, умноженное на вес поля.
+    """
+    term = models.CharField('Слово', max_length=64)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name='+'
+    )
+    comment = models.ForeignKey(
+        Comment,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name='+'
+    )
+    weight = models.PositiveIntegerField('Вес')
+
+    class Meta:
+        verbose_name = 'Слово поискового индекса'
+        verbose_name_plural = 'Поисковый индекс'
+        indexes = [
+            models.Index(fields=['term', 'post'],
+                         name='searchterm_term_post_idx'),
+        ]
+
+
+class ImageVariant(models.Model):
+    """Кадр картинки поста определённой ширины и формата для srcset."""
+    source = models.CharField('Исходная картинка', max_length=255)
+    format = models.CharField('Формат', max_length=8)
+    width = models.PositiveIntegerField('Ширина')
+    height = models.PositiveIntegerField('Высота')
+    file = models.FileField('Файл', max_length=255)
+    size = models.PositiveIntegerField('Размер, байт')
+
+    class Meta:
+        verbose_name = 'Вариант картинки'
+        verbose_name_plural = 'Варианты картинок'
+        # Уникальный индекс начинается с source: им же ищутся варианты.
+        constraints = [
+            UniqueConstraint(fields=['source', 'format', 'width'],
+                             name='unique_image_variant'),
+        ]
+
+
+class MediaBlob(models.Model):
+    """Файл картинки в хранилище по содержимому и число постов с ним.
+
+    Счётчик поддерживается сигналами; файлы без ссылок удаляет
+    media.collect() (команда dedupe_media).
+    """
+    name = models.CharField('Файл', max_length=255, primary_key=True)
+    refs = models.PositiveIntegerField('Постов с картинкой', default=0)
+
+    class Meta:
+        verbose_name = 'Файл картинки'
+        verbose_name_plural = 'Файлы картинок'
+
+
+class Suggestion(models.Model):
+    """«Кого почитать»: автор, предложенный пользователю, и его вес.
+
+    Таблицу пересчитывает команда recommend; после подписок строки
+    подписчика обновляются по одной (posts.recommendations).
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='suggestions'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    score = models.FloatField('Вес')
+
+    class Meta:
+        verbose_name = 'Рекомендация'
+        verbose_name_plural = 'Рекомендации'
+        ordering = ['-score', 'author']
+        constraints = [
+            UniqueConstraint(fields=['user', 'author'],
+                             name='unique_suggestion'),
+        ]
+
+
+class TrendBucket(models.Model):
+    """Комментарии и посты у поста или группы за один интервал.
+
+    Интервал — номер отрезка длиной TRENDING_BUCKET секунд от начала
+    эпохи. Строки пополняются сигналами, а рейтинги «Популярного»
+    из них пересчитывает команда trending (posts.trending).
+    """
+    POST = 'post'
+    GROUP = 'group'
+    KINDS = [(POST, 'Пост'), (GROUP, 'Группа')]
+
+    kind = models.CharField('Тип', max_length=5, choices=KINDS)
+    object_id = models.PositiveIntegerField('id поста или группы')
+    bucket = models.PositiveIntegerField('Интервал')
+    comments = models.PositiveIntegerField('Комментариев', default=0)
+    posts = models.PositiveIntegerField('Постов', default=0)
+
+    class Meta:
+        verbose_name = 'Активность за интервал'
+        verbose_name_plural = 'Активность по интервалам'
+        constraints = [
+            UniqueConstraint(fields=['kind', 'object_id', 'bucket'],
+                             name='unique_trend_bucket'),
+        ]
+        indexes = [
+            models.Index(fields=['bucket'], name='trendbucket_bucket_idx'),
+        ]
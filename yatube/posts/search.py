@@ -0,0 +1,270 @@
+"""Полнотекстовый поиск по постам и комментариям.
+
+На SQLite с FTS5 индекс — две виртуальные таблицы (посты и комментарии),
+ранжирование — bm25. На других СУБД (или при SEARCH_BACKEND='python')
+работает запасной обратный индекс в модели SearchTerm: слова разбираются
+в Python, ранг — сумма частот слов с весом поля.
+
+Индекс обновляется сигналами при сохранении и удалении Post и Comment;
+rebuild() (команда rebuild_search_index) строит его с нуля.
+"""
+import functools
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import (Case, Count, IntegerField, Q, Sum, Value,
+                              When)
+
+from .models import Comment, Post, SearchTerm
+
+BATCH_SIZE = 500
+# Совпадение в тексте поста весит вдвое больше, чем в комментарии.
+POST_WEIGHT = 2
+# Длинные запросы обрезаются: каждое слово — отдельное условие.
+MAX_TERMS = 10
+
+WORD_RE = re.compile(r'[^\W_]+')
+# unicode61 не считает «ё» буквой «е» с диакритикой, поэтому текст
+# нормализуется до индекса — в Python и в SQL одинаково.
+YO = str.maketrans('ёЁ', 'еЕ')
+NORMALIZE_SQL = "replace(replace({}, 'ё', 'е'), 'Ё', 'Е')"
+FTS_TOKENIZE = 'unicode61 remove_diacritics 2'
+
+FTS_HITS = '''
+    SELECT post_id, MAX(score) AS score FROM (
+        SELECT rowid AS post_id,
+               -bm25(posts_post_search) * %s AS score
+        FROM posts_post_search WHERE posts_post_search MATCH %s
+        UNION ALL
+        SELECT post_id, -bm25(posts_comment_search)
+        FROM posts_comment_search
+        WHERE posts_comment_search MATCH %s AND post_id IS NOT NULL
+    ) GROUP BY post_id
+'''
+
+FILL_POSTS = (
+    'INSERT INTO posts_post_search (rowid, text) '
+    f'SELECT id, {NORMALIZE_SQL.format("text")} FROM posts_post'
+)
+FILL_COMMENTS = (
+    'INSERT INTO posts_comment_search (rowid, text, post_id) '
+    f'SELECT id, {NORMALIZE_SQL.format("text")}, post_id FROM posts_comment'
+)
+
+
+def fts5_available(conn):
+    if conn.vendor != 'sqlite':
+        return False
+    with conn.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return ('ENABLE_FTS5',) in cursor.fetchall()
+
+
+@functools.lru_cache(maxsize=None)
+def _fts5_available():
+    return fts5_available(connection)
+
+
+def use_fts():
+    if settings.SEARCH_BACKEND == 'auto':
+        return _fts5_available()
+    return settings.SEARCH_BACKEND == 'fts5'
+
+
+def normalize(text):
+    return text.translate(YO)
+
+
+def tokenize(text):
+    """Слова текста в нижнем регистре, «ё» заменена на «е»."""
+    return WORD_RE.findall(normalize(text).lower())
+
+
+def query_terms(query):
+    return list(dict.fromkeys(tokenize(query)))[:MAX_TERMS]
+
+
+def _match(terms):
+    # Каждое слово в кавычках: операторы FTS5 из запроса не действуют.
+    # Поиск по началу слова заменяет стемминг: «туман» найдёт «тумане».
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def _terms(text, weight, **fields):
+    counts = {}
+    for term in tokenize(text):
+        counts[term] = counts.get(term, 0) + weight
+    return [SearchTerm(term=term[:64], weight=value, **fields)
+            for term, value in counts.items()]
+
+
+def _python_matches(terms, field):
+    """Документы field, в которых есть слова на каждое из terms."""
+    condition = Q()
+    for term in terms:
+        condition |= Q(term__startswith=term)
+    # Номер слова запроса, на которое начинается слово документа.
+    matched = Case(*(When(term__startswith=term, then=Value(index))
+                     for index, term in enumerate(terms)),
+                   output_field=IntegerField())
+    return (
+        SearchTerm.objects.filter(condition, **{f'{field}__isnull': False})
+        .values(field)
+        .annotate(score=Sum('weight'),
+                  matched=Count(matched, distinct=True))
+        .filter(matched=len(terms))
+    )
+
+
+def filter_posts(posts, query):
+    """Посты из posts, подходящие под query сами или комментариями."""
+    terms = query_terms(query)
+    if not terms:
+        return posts.none()
+    if use_fts():
+        # extra(), а не pk__in=RawSQL: лишние скобки вокруг RawSQL
+        # превращают подзапрос в IN в одно скалярное значение.
+        return posts.extra(
+            where=[f'posts_post.id IN (SELECT post_id FROM ({FTS_HITS}))'],
+            params=[POST_WEIGHT, _match(terms), _match(terms)])
+    return posts.filter(
+        pk__in=_python_matches(terms, 'post').values('post'))
+
+
+def filter_comments(comments, query):
+    terms = query_terms(query)
+    if not terms:
+        return comments.none()
+    if use_fts():
+        return comments.extra(
+            where=['posts_comment.id IN (SELECT rowid FROM '
+                   'posts_comment_search WHERE posts_comment_search '
+                   'MATCH %s)'],
+            params=[_match(terms)])
+    return comments.filter(
+        pk__in=_python_matches(terms, 'comment').values('comment'))
+
+
+class SearchSource:
+    """Источник для CursorPaginator: посты по убыванию ранга.
+
+    Ключ страницы — (ранг, id), поэтому курсоры работают так же,
+    как в лентах, и глубина страницы не влияет на цену запроса.
+    """
+
+    name = 'search'
+    cursor_salt = 'posts.search.cursor'
+
+    def __init__(self, query):
+        self.terms = query_terms(query)
+
+    def hits(self, cursor, reverse, limit):
+        if use_fts():
+            return self._fts_hits(cursor, reverse, limit)
+        hits = _python_matches(self.terms, 'post')
+        if cursor is not None:
+            score, pk = cursor
+            op = 'gt' if reverse else 'lt'
+            hits = hits.filter(Q(**{f'score__{op}': score})
+                               | Q(score=score, **{f'post__{op}': pk}))
+        # post_id, а не post: иначе сортировка пойдёт по Meta.ordering Post.
+        order = ('score', 'post_id') if reverse else ('-score', '-post_id')
+        return [(row['post'], row['score'])
+                for row in hits.order_by(*order)[:limit]]
+
+    def _fts_hits(self, cursor, reverse, limit):
+        match = _match(self.terms)
+        params = [POST_WEIGHT, match, match]
+        where = ''
+        if cursor is not None:
+            op = '>' if reverse else '<'
+            where = (f'WHERE score {op} %s '
+                     f'OR (score = %s AND post_id {op} %s)')
+            params += [cursor[0], cursor[0], cursor[1]]
+        order = 'ASC' if reverse else 'DESC'
+        with connection.cursor() as db:
+            db.execute(
+                f'SELECT post_id, score FROM ({FTS_HITS}) {where} '
+                f'ORDER BY score {order}, post_id {order} LIMIT %s',
+                params + [limit])
+            return db.fetchall()
+
+    def fetch(self, cursor, reverse, limit):
+        if not self.terms:
+            return []
+        hits = self.hits(cursor, reverse, limit)
+        posts = Post.objects.for_feed().in_bulk([pk for pk, _ in hits])
+        rows = []
+        for pk, score in hits:
+            if pk in posts:
+                posts[pk].search_score = score
+                rows.append(((score, pk), self.name, posts[pk]))
+        return rows
+
+
+def index_post(post):
+    if use_fts():
+        with connection.cursor() as db:
+            db.execute('INSERT OR REPLACE INTO posts_post_search '
+                       '(rowid, text) VALUES (%s, %s)',
+                       [post.pk, normalize(post.text)])
+        return
+    SearchTerm.objects.filter(post=post, comment=None).delete()
+    SearchTerm.objects.bulk_create(
+        _terms(post.text, POST_WEIGHT, post_id=post.pk))
+
+
+def unindex_post(post):
+    # Строки SearchTerm удаляются каскадом вместе с постом.
+    if use_fts():
+        with connection.cursor() as db:
+            db.execute('DELETE FROM posts_post_search WHERE rowid = %s',
+                       [post.pk])
+
+
+def index_comment(comment):
+    if use_fts():
+        with connection.cursor() as db:
+            db.execute('INSERT OR REPLACE INTO posts_comment_search '
+                       '(rowid, text, post_id) VALUES (%s, %s, %s)',
+                       [comment.pk, normalize(comment.text),
+                        comment.post_id])
+        return
+    SearchTerm.objects.filter(comment=comment).delete()
+    SearchTerm.objects.bulk_create(_terms(
+        comment.text, 1, post_id=comment.post_id, comment_id=comment.pk))
+
+
+def unindex_comment(comment):
+    if use_fts():
+        with connection.cursor() as db:
+            db.execute('DELETE FROM posts_comment_search WHERE rowid = %s',
+                       [comment.pk])
+
+
+def rebuild():
+    """Строит индекс заново по всем постам и комментариям."""
+    if use_fts():
+        with connection.cursor() as db:
+            db.execute('DELETE FROM posts_post_search')
+            db.execute('DELETE FROM posts_comment_search')
+            db.execute(FILL_POSTS)
+            db.execute(FILL_COMMENTS)
+        return
+    SearchTerm.objects.all().delete()
+    terms = []
+    for text, weight, fields in _documents():
+        terms += _terms(text, weight, **fields)
+        if len(terms) >= BATCH_SIZE:
+            SearchTerm.objects.bulk_create(terms)
+            terms = []
+    SearchTerm.objects.bulk_create(terms)
+
+
+def _documents():
+    for post in Post.objects.only('text').iterator():
+        yield post.text, POST_WEIGHT, {'post_id': post.pk}
+    for comment in Comment.objects.only('text', 'post').iterator():
+        yield comment.text, 1, {'post_id': comment.post_id,
+                                'comment_id': comment.pk}
@@ -0,0 +1,104 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import (counters, feed, follows, generations, media, search,
+               trending)
+from .models import (Comment, Follow, Group, Post, PostStats, User,
+                     UserStats)
+
+
+def _comment_post(comment):
+    if Comment.post.is_cached(comment):
+        return comment.post
+    return Post.objects.filter(pk=comment.post_id).first()
+
+
+@receiver(pre_save, sender=Post)
+def remember_group(sender, instance, **kwargs):
+    # При смене группы нужно сбросить и ленту старой группы, при смене
+    # картинки — отпустить ссылку на старый файл.
+    if instance.pk:
+        old = Post.objects.filter(pk=instance.pk).values_list(
+            'group_id', 'image').first()
+        instance._old_group_id, instance._old_image = old or (None, None)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.bump(UserStats, instance.author_id, 'posts_count', 1)
+        feed.push_post(instance)
+        trending.post_created(instance)
+    old_image = getattr(instance, '_old_image', None)
+    if created or old_image != instance.image.name:
+        media.release(old_image)
+        media.acquire(instance.image.name)
+    search.index_post(instance)
+    generations.bump(*generations.post_scopes(
+        instance, getattr(instance, '_old_group_id', None)))
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    counters.bump(UserStats, instance.author_id, 'posts_count', -1)
+    media.release(instance.image.name)
+    search.unindex_post(instance)
+    generations.bump(*generations.post_scopes(instance))
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    search.index_comment(instance)
+    if not instance.post_id:
+        return
+    if created:
+        counters.bump(PostStats, instance.post_id, 'comments_count', 1)
+    post = _comment_post(instance)
+    if post:
+        if created:
+            trending.comment_created(post)
+        generations.bump(*generations.post_scopes(post))
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    search.unindex_comment(instance)
+    if not instance.post_id:
+        return
+    counters.bump(PostStats, instance.post_id, 'comments_count', -1)
+    post = _comment_post(instance)
+    if post:
+        generations.bump(*generations.post_scopes(post))
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, **kwargs):
+    # Название и описание группы — на странице её ленты, название
+    # и адрес — в карточках её постов.
+    if not created:
+        generations.bump(generations.group(instance.pk),
+                         generations.group_info(instance.pk),
+                         generations.NAMES)
+
+
+# Поля пользователя, которые видны в карточках его постов.
+CARD_USER_FIELDS = {'username', 'first_name', 'last_name'}
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields, **kwargs):
+    # Вход обновляет last_login — карточки от этого не меняются.
+    if created or (update_fields and not CARD_USER_FIELDS & update_fields):
+        return
+    generations.bump(generations.user(instance.pk), generations.NAMES)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        follows.followed(instance.user_id, [instance.author_id])
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    follows.unfollowed(instance.user_id, [instance.author_id])
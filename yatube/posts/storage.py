@@ -0,0 +1,51 @@
+"""Хранилище картинок постов по содержимому.
+
+Файл сохраняется под именем из sha256 своего содержимого:
+posts/ab/ab12…ef.jpg. Одинаковая картинка, загруженная тысячей
+пользователей, лежит на диске один раз, а миниатюры и варианты, которые
+привязаны к имени файла, строятся для неё тоже один раз.
+"""
+import hashlib
+import os
+import re
+
+from django.core.files.storage import FileSystemStorage
+
+CONTENT_NAME_RE = re.compile(r'(?:.*/)?([0-9a-f]{2})/\1[0-9a-f]{62}\.\w+')
+
+
+def digest(content):
+    sha256 = hashlib.sha256()
+    for chunk in content.chunks():
+        sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def is_content_name(name):
+    """Сохранён ли файл name уже под именем из хэша содержимого."""
+    return bool(CONTENT_NAME_RE.fullmatch(name))
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage, который кладёт одинаковые файлы в одно место."""
+
+    def content_name(self, name, content):
+        directory, basename = os.path.split(name)
+        extension = os.path.splitext(basename)[1].lower()
+        value = digest(content)
+        return os.path.join(directory, value[:2], value + extension)
+
+    def _save(self, name, content):
+        name = self.content_name(name, content)
+        if self.exists(name):
+            # Такое содержимое уже есть: второй копии не нужно.
+            return name
+        saved = super()._save(name, content)
+        if saved != name:
+            # Такой же файл успели записать между exists() и записью,
+            # и FileSystemStorage сохранил копию под другим именем.
+            self.delete(saved)
+        return name
+
+
+image_storage = ContentAddressedStorage()
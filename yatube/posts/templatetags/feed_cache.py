@@ -0,0 +1,38 @@
+from django import template
+from posts import fragments
+
+register = template.Library()
+
+
+class FeedCacheNode(template.Node):
+    def __init__(self, nodelist, feed_cache, vary_on):
+        self.nodelist = nodelist
+        self.feed_cache = feed_cache
+        self.vary_on = vary_on
+
+    def render(self, context):
+        feed_cache = self.feed_cache.resolve(context)
+        key = fragments.make_key(
+            feed_cache['name'],
+            [var.resolve(context) for var in self.vary_on])
+        return fragments.get_or_render(
+            key, feed_cache['version'],
+            lambda: self.nodelist.render(context),
+            feed_cache['timeout'])
+
+
+@register.tag('feedcache')
+def do_feedcache(parser, token):
+    """Как {% cache %}, но через posts.fragments.
+
+    {% feedcache feed_cache [vary_on ...] %} ... {% endfeedcache %},
+    где feed_cache — словарь из generations.feed_cache().
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' tag requires at least 1 argument.")
+    nodelist = parser.parse(('endfeedcache',))
+    parser.delete_first_token()
+    return FeedCacheNode(nodelist, parser.compile_filter(bits[1]),
+                         [parser.compile_filter(bit) for bit in bits[2:]])
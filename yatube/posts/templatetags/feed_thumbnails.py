@@ -0,0 +1,12 @@
+from django import template
+
+register = template.Library()
+
+
+@register.inclusion_tag('posts/includes/picture.html')
+def picture(post):
+    """<picture> с srcset по вариантам, иначе — обычная миниатюра."""
+    return {
+        'variants': getattr(post, 'variants', None),
+        'thumbnail': getattr(post, 'thumbnail', None),
+    }
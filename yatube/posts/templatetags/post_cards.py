@@ -0,0 +1,14 @@
+from django import template
+from django.utils.safestring import mark_safe
+from posts import cards
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_cards(page_obj):
+    """HTML карточек постов страницы из кэша posts.cards.
+
+    {% post_cards page_obj as cards %}, дальше — цикл по cards.
+    """
+    return [mark_safe(card) for card in cards.render(page_obj)]
@@ -0,0 +1,83 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_in
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from posts import cards
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class PostCardTestCase(TestCase):
+    """Класс для проверки кэша карточек постов."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='author',
+                                        first_name='Анна')
+        self.group = Group.objects.create(title='Группа', slug='group')
+        self.post = Post.objects.create(author=self.user, text='текст',
+                                        group=self.group)
+
+    def render(self):
+        """Карточка поста и число карточек, отрендеренных заново."""
+        posts = list(Post.objects.for_feed())
+        with mock.patch.object(cards, 'render_to_string',
+                               wraps=cards.render_to_string) as render:
+            html = cards.render(posts)
+        return html[0], render.call_count
+
+    def test_card_rendered_once_for_all_feeds(self):
+        card, rendered = self.render()
+        self.assertEqual(rendered, 1)
+        self.assertEqual(self.render(), (card, 0))
+        for url in (reverse('posts:index'),
+                    reverse('posts:group_list', args=[self.group.slug]),
+                    reverse('posts:profile', args=[self.user.username])):
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), card)
+
+    def test_changes_rerender_card(self):
+        self.render()
+
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'новый текст'
+        post.save()
+        self.assertIn('новый текст', self.render()[0])
+
+        self.user.first_name = 'Вера'
+        self.user.save()
+        self.assertIn('Вера', self.render()[0])
+
+        self.group.slug = 'renamed'
+        self.group.save()
+        self.assertIn('/group/renamed/', self.render()[0])
+
+        Comment.objects.create(post=self.post, author=self.user, text='c')
+        self.assertIn('Комментариев: 1', self.render()[0])
+
+    def test_renames_reach_cached_feeds(self):
+        index = reverse('posts:index')
+        urls = (index, reverse('posts:group_list', args=[self.group.slug]),
+                reverse('posts:profile', args=[self.user.username]))
+        for url in urls:
+            self.client.get(url)
+
+        self.user.first_name = 'Вера'
+        self.user.save()
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'Вера')
+
+        self.group.slug = 'renamed'
+        self.group.save()
+        self.assertContains(self.client.get(index), '/group/renamed/')
+
+    def test_login_keeps_card(self):
+        self.render()
+        user_logged_in.send(sender=User, request=None, user=self.user)
+
+        self.assertEqual(self.render()[1], 0)
@@ -0,0 +1,139 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTestCase(TestCase):
+    """Класс для проверки ответов 304 на страницах лент и поста."""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username='author')
+        self.reader = User.objects.create(username='reader')
+        self.group = Group.objects.create(title='Группа', slug='group',
+                                          description='Описание')
+        self.post = Post.objects.create(author=self.author, text='text',
+                                        group=self.group)
+        self.client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        ]
+
+    def test_not_modified_without_rendering(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                etag = response['ETag']
+                self.assertTrue(response.has_header('Last-Modified'))
+
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+                self.assertEqual(response.status_code,
+                                 HTTPStatus.NOT_MODIFIED)
+                self.assertEqual(response.templates, [])
+                self.assertEqual(response['ETag'], etag)
+
+    def test_if_modified_since(self):
+        url = reverse('posts:index')
+        last_modified = self.client.get(url)['Last-Modified']
+
+        response = self.client.get(url,
+                                   HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_changes_invalidate_etag(self):
+        changes = [
+            lambda: Post.objects.create(author=self.author, text='new',
+                                        group=self.group),
+            lambda: Comment.objects.create(post=self.post,
+                                           author=self.reader, text='c'),
+        ]
+        for change in changes:
+            etags = [self.client.get(url)['ETag'] for url in self.urls]
+            change()
+            for url, etag in zip(self.urls, etags):
+                with self.subTest(url=url):
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                    self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_renames_invalidate_etag(self):
+        def rename_author():
+            self.author.first_name = 'Новое имя'
+            self.author.save()
+
+        def rename_group():
+            self.group.title = 'Новое название'
+            self.group.save()
+
+        for change in (rename_author, rename_group):
+            etags = [self.client.get(url)['ETag'] for url in self.urls]
+            change()
+            for url, etag in zip(self.urls, etags):
+                with self.subTest(change=change.__name__, url=url):
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                    self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_commenter_rename_invalidates_post_page(self):
+        Comment.objects.create(post=self.post, author=self.reader, text='c')
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        etag = self.client.get(url)['ETag']
+        self.reader.username = 'renamed'
+        self.reader.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertContains(response, 'renamed')
+
+    def test_group_edit_invalidates_group_page(self):
+        url = reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        etag = self.client.get(url)['ETag']
+        self.group.title = 'Новое название'
+        self.group.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertContains(response, 'Новое название')
+
+    def test_etag_varies_by_user(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertNotEqual(self.client.get(url)['ETag'],
+                                    self.reader_client.get(url)['ETag'])
+
+    def test_follow_invalidates_profile_and_follow_feed(self):
+        urls = [reverse('posts:profile', kwargs={'username': 'author'}),
+                reverse('posts:follow_index')]
+        etags = [self.reader_client.get(url)['ETag'] for url in urls]
+        Follow.objects.create(user=self.reader, author=self.author)
+        for url, etag in zip(urls, etags):
+            with self.subTest(url=url):
+                response = self.reader_client.get(url,
+                                                  HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_follow_changes_author_counters_for_guests(self):
+        url = reverse('posts:profile', kwargs={'username': 'author'})
+        etag = self.client.get(url)['ETag']
+        Follow.objects.create(user=self.reader, author=self.author)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertContains(response, 'Подписчиков: 1')
+
+    def test_missing_object_is_404(self):
+        response = self.client.get(
+            reverse('posts:group_list', kwargs={'slug': 'missing'}))
+
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
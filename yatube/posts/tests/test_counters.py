@@ -0,0 +1,83 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts import counters
+from posts.models import Comment, Follow, Post, PostStats, UserStats
+
+User = get_user_model()
+
+
+class CountersTestCase(TestCase):
+    """Класс для проверки денормализованных счётчиков."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='Anna')
+        cls.author = User.objects.create(username='Vadim')
+
+    def setUp(self):
+        self.post = Post.objects.create(text='text', author=self.author)
+
+    def stats(self, user):
+        return UserStats.objects.get(pk=user.pk)
+
+    def test_bump_writes_without_reading(self):
+        """bump не начинает транзакцию с чтения."""
+        with CaptureQueriesContext(connection) as ctx:
+            counters.bump(UserStats, self.user.pk, 'posts_count', 1)
+
+        statements = [query['sql'].split()[0].upper()
+                      for query in ctx.captured_queries]
+        self.assertNotIn('SELECT', statements)
+        self.assertEqual(self.stats(self.user).posts_count, 1)
+
+    def test_signals_keep_counters(self):
+        """Сохранение и удаление Post, Comment, Follow меняют счётчики."""
+        follow = Follow.objects.create(user=self.user, author=self.author)
+        comment = Comment.objects.create(post=self.post, author=self.user,
+                                         text='comment')
+        Post.objects.create(text='text', author=self.author)
+
+        self.assertEqual(self.stats(self.author).posts_count, 2)
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.user).following_count, 1)
+        self.assertEqual(
+            PostStats.objects.get(pk=self.post.pk).comments_count, 1)
+
+        comment.delete()
+        follow.delete()
+        self.post.delete()
+
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        self.assertEqual(self.stats(self.author).followers_count, 0)
+        self.assertEqual(self.stats(self.user).following_count, 0)
+
+    def test_views_read_stored_counters(self):
+        """Профиль берёт число постов из статистики, без COUNT."""
+        UserStats.objects.filter(pk=self.author.pk).update(posts_count=42)
+        url = reverse('posts:profile',
+                      kwargs={'username': self.author.username})
+
+        response = Client().get(url)
+
+        self.assertEqual(response.context['counter_posts'], 42)
+
+    def test_reconcile_repairs_drift(self):
+        """Команда reconcile_counters исправляет расхождения."""
+        Follow.objects.create(user=self.user, author=self.author)
+        UserStats.objects.update(posts_count=7, followers_count=0)
+        PostStats.objects.create(post=self.post, comments_count=3)
+
+        call_command('reconcile_counters', stdout=StringIO())
+
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.user).posts_count, 0)
+        self.assertEqual(
+            PostStats.objects.get(pk=self.post.pk).comments_count, 0)
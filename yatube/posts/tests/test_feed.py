@@ -0,0 +1,130 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Follow, Inbox, Post
+
+User = get_user_model()
+
+
+class InboxTestCase(TestCase):
+    """Класс для проверки ленты подписок Inbox."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='Anna')
+        cls.author = User.objects.create(username='Vadim')
+        cls.other = User.objects.create(username='Lena')
+        for x in range(3):
+            Post.objects.create(text=f'text{x}', author=cls.author)
+            Post.objects.create(text=f'text{x}', author=cls.other)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def inbox_posts(self):
+        return list(self.user.inbox.values_list('post_id', flat=True))
+
+    def test_follow_backfills_inbox(self):
+        """Подписка добавляет в ленту все посты автора."""
+        self.client.post(reverse('posts:profile_follow',
+                                 kwargs={'username': self.author.username}))
+
+        self.assertCountEqual(
+            self.inbox_posts(),
+            self.author.post_author.values_list('pk', flat=True))
+
+    def test_new_post_is_pushed(self):
+        """Новый пост попадает в ленты подписчиков."""
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(text='new', author=self.author)
+
+        response = self.client.get(reverse('posts:follow_index'))
+
+        self.assertEqual(response.context['page_obj'][0], post)
+        self.assertIn(post.pk, self.inbox_posts())
+
+    def test_unfollow_trims_inbox(self):
+        """Отписка убирает посты автора из ленты."""
+        Follow.objects.create(user=self.user, author=self.author)
+        Follow.objects.create(user=self.user, author=self.other)
+        self.client.post(reverse('posts:profile_unfollow',
+                                 kwargs={'username': self.author.username}))
+
+        self.assertFalse(
+            self.user.inbox.filter(author=self.author).exists())
+        self.assertEqual(len(self.inbox_posts()), 3)
+
+    def test_rebuild_inbox_command(self):
+        """Команда rebuild_inbox восстанавливает ленту с нуля."""
+        Follow.objects.create(user=self.user, author=self.author)
+        expected = self.inbox_posts()
+        Inbox.objects.all().delete()
+
+        call_command('rebuild_inbox', stdout=StringIO())
+
+        self.assertCountEqual(self.inbox_posts(), expected)
+
+
+@override_settings(FEED_PULL_THRESHOLD=1)
+class HybridFeedTestCase(TestCase):
+    """Класс для проверки смешанной ленты подписок (push + pull)."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='Anna')
+        cls.fan = User.objects.create(username='Fan')
+        cls.star = User.objects.create(username='Star')
+        cls.author = User.objects.create(username='Vadim')
+        Follow.objects.create(user=cls.fan, author=cls.star)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+        Follow.objects.create(user=self.user, author=self.star)
+        Follow.objects.create(user=self.user, author=self.author)
+        for x in range(6):
+            Post.objects.create(text=f'star{x}', author=self.star)
+            Post.objects.create(text=f'text{x}', author=self.author)
+
+    def test_popular_author_is_not_pushed(self):
+        """Посты автора выше порога не раскладываются по лентам."""
+        self.assertFalse(Inbox.objects.filter(author=self.star).exists())
+        self.assertEqual(self.user.inbox.count(), 6)
+
+    def test_feed_merges_push_and_pull(self):
+        """Лента сливает оба источника по дате и сообщает их вклад."""
+        url = reverse('posts:follow_index')
+        expected = list(Post.objects.filter(
+            author__in=[self.star, self.author]).order_by('-pub_date'))
+
+        first = self.client.get(url)
+        page_obj = first.context['page_obj']
+        second = self.client.get(f'{url}?{page_obj.next_query}')
+
+        self.assertEqual(
+            list(page_obj) + list(second.context['page_obj']), expected)
+        counts = page_obj.source_counts
+        self.assertEqual(counts['push'] + counts['pull'], len(page_obj))
+        self.assertEqual(first['X-Feed-Sources'],
+                         f'pull={counts["pull"]}, push={counts["push"]}')
+
+    def test_author_below_threshold_is_pushed_again(self):
+        """Посты автора, опустившегося до порога, возвращаются в ленты."""
+        late = User.objects.create(username='Late')
+        Follow.objects.create(user=late, author=self.star)
+        post = Post.objects.create(text='new', author=self.star)
+
+        Follow.objects.filter(user=self.fan, author=self.star).delete()
+        Follow.objects.filter(user=late, author=self.star).delete()
+
+        star_posts = set(self.star.post_author.values_list('pk', flat=True))
+        self.assertEqual(set(self.user.inbox.filter(
+            author=self.star).values_list('post_id', flat=True)), star_posts)
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.context['page_obj'][0], post)
@@ -0,0 +1,69 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase
+from posts import follow_sets, follows
+from posts.models import Follow
+
+User = get_user_model()
+
+
+class FollowSetTestCase(TestCase):
+    """Класс для проверки множеств подписок в кэше."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='reader')
+        self.authors = [User.objects.create(username=f'author{index}')
+                        for index in range(3)]
+
+    def test_follow_and_unfollow_invalidate(self):
+        first, second, _ = self.authors
+        Follow.objects.create(user=self.user, author=first)
+        self.assertEqual(follow_sets.load(self.user.pk), {first.pk})
+
+        follows.follow(self.user, User.objects.filter(pk=second.pk))
+        self.assertEqual(follow_sets.load(self.user.pk),
+                         {first.pk, second.pk})
+
+        Follow.objects.filter(author=first).delete()
+        with self.assertNumQueries(1):
+            self.assertEqual(follow_sets.load(self.user.pk), {second.pk})
+        with self.assertNumQueries(0):
+            self.assertEqual(follow_sets.load(self.user.pk), {second.pk})
+
+    def test_large_author_id(self):
+        author = User.objects.create(pk=2 ** 40, username='big')
+        Follow.objects.create(user=self.user, author=author)
+
+        self.assertEqual(follow_sets.load(self.user.pk), {author.pk})
+
+    def test_loaded_once_per_request(self):
+        Follow.objects.create(user=self.user, author=self.authors[0])
+        follow_sets.load(self.user.pk)
+        user = User.objects.get(pk=self.user.pk)
+
+        with self.assertNumQueries(0):
+            first = follow_sets.following(user)
+        with mock.patch('posts.follow_sets.load') as load:
+            self.assertIs(follow_sets.following(user), first)
+        load.assert_not_called()
+        self.assertEqual(follow_sets.following(AnonymousUser()), set())
+
+    def test_template_tag(self):
+        Follow.objects.create(user=self.user, author=self.authors[1])
+        request = RequestFactory().get('/')
+        request.user = self.user
+        template = Template(
+            '{% load follow_sets %}{% following_ids as following %}'
+            '{% for author in authors %}'
+            '{% if author.pk in following %}+{% else %}-{% endif %}'
+            '{% endfor %}')
+
+        html = template.render(Context({'request': request,
+                                        'authors': self.authors}))
+
+        self.assertEqual(html, '-+-')
@@ -0,0 +1,117 @@
+import json
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts import follows
+from posts.models import Follow, Post, UserStats
+
+User = get_user_model()
+
+
+class FollowTestCase(TestCase):
+    """Класс для проверки подписок одним запросом и пакетом."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='reader')
+        self.authors = [User.objects.create(username=f'author{index}')
+                        for index in range(3)]
+        for author in self.authors:
+            Post.objects.create(author=author, text='text')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def stats(self, user, field):
+        return UserStats.objects.filter(pk=user.pk).values_list(
+            field, flat=True).first() or 0
+
+    def following(self):
+        return set(self.user.follower.values_list('author_id', flat=True))
+
+    def test_follow_is_idempotent(self):
+        for has_returning in (True, False):
+            Follow.objects.all().delete()
+            authors = User.objects.filter(
+                pk__in=[author.pk for author in self.authors[:2]])
+            with self.subTest(has_returning=has_returning), \
+                    mock.patch('posts.follows._has_returning',
+                               return_value=has_returning):
+                created = follows.follow(self.user, authors)
+                again = follows.follow(self.user, authors)
+
+                self.assertCountEqual(created,
+                                      [a.pk for a in self.authors[:2]])
+                self.assertEqual(again, [])
+                self.assertEqual(self.stats(self.user, 'following_count'), 2)
+                self.assertEqual(
+                    self.stats(self.authors[0], 'followers_count'), 1)
+                self.assertEqual(self.user.inbox.count(), 2)
+
+                deleted = follows.unfollow(self.user, authors)
+
+                self.assertCountEqual(deleted, created)
+                self.assertEqual(follows.unfollow(self.user, authors), [])
+                self.assertEqual(self.stats(self.user, 'following_count'), 0)
+                self.assertEqual(self.user.inbox.count(), 0)
+
+    def test_cannot_follow_self_or_missing_user(self):
+        self.client.post(reverse('posts:profile_follow',
+                                 kwargs={'username': 'reader'}))
+        response = self.client.post(reverse('posts:profile_follow',
+                                            kwargs={'username': 'missing'}))
+
+        self.assertEqual(self.following(), set())
+        self.assertRedirects(response, reverse(
+            'posts:profile', kwargs={'username': 'missing'}),
+            target_status_code=HTTPStatus.NOT_FOUND)
+
+    def bulk(self, data):
+        return self.client.post(reverse('posts:follow_bulk'),
+                                json.dumps(data),
+                                content_type='application/json')
+
+    def test_bulk_follow_and_unfollow(self):
+        Follow.objects.create(user=self.user, author=self.authors[2])
+        first, second, third = (author.pk for author in self.authors)
+
+        response = self.bulk({'follow': [first, second, self.user.pk],
+                              'unfollow': [third]})
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.json(), {'following': {
+            str(first): True, str(second): True, str(self.user.pk): False,
+            str(third): False}})
+        self.assertEqual(self.following(), {first, second})
+        self.assertEqual(self.stats(self.user, 'following_count'), 2)
+        self.assertEqual(self.stats(self.authors[2], 'followers_count'), 0)
+
+    def test_bulk_follow_only_and_unfollow_only(self):
+        first = self.authors[0].pk
+
+        response = self.bulk({'follow': [first]})
+        self.assertEqual(response.json(), {'following': {str(first): True}})
+        self.assertEqual(self.following(), {first})
+
+        response = self.bulk({'unfollow': [first]})
+        self.assertEqual(response.json(),
+                         {'following': {str(first): False}})
+        self.assertEqual(self.following(), set())
+
+    @override_settings(FOLLOW_BULK_LIMIT=2)
+    def test_bulk_rejects_bad_requests(self):
+        for data in ({'follow': [1, 2, 3]}, {'follow': 'abc'},
+                     {'follow': ['abc']}, [1, 2],
+                     {'follow': [10 ** 23]}, {'unfollow': [0]}):
+            with self.subTest(data=data):
+                response = self.bulk(data)
+                self.assertEqual(response.status_code,
+                                 HTTPStatus.BAD_REQUEST)
+                self.assertIn('error', response.json())
+        self.assertEqual(
+            self.client.get(reverse('posts:follow_bulk')).status_code,
+            HTTPStatus.METHOD_NOT_ALLOWED)
+        self.assertEqual(self.following(), set())
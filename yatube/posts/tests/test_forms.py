@@ -1,3 +1,4 @@
+import hashlib
 import shutil
 import tempfile
 from http import HTTPStatus
@@ -34,6 +35,9 @@ class PostsBaseTest(TestCase):
                          b'\x00\x00\x00\x2C\x00\x00\x00\x00'
                          b'\x02\x00\x01\x00\x00\x02\x02\x0C'
                          b'\x0A\x00\x3B')
+        # Хранилище по содержимому называет файл по его sha256.
+        digest = hashlib.sha256(cls.small_gif).hexdigest()
+        cls.image_name = f'posts/{digest[:2]}/{digest}.gif'
 
         cls.uploaded = SimpleUploadedFile(
             name='small.gif',
@@ -77,7 +81,7 @@ class CreateFormTestCase(PostsBaseTest):
         self.assertTrue(
             Post.objects.filter(
                 text=form_data['text'],
-                image='posts/small.gif'
+                image=self.image_name
             ).exists()
         )
 
@@ -116,7 +120,7 @@ class PostEditFormTestCase(PostsBaseTest):
         self.assertTrue(
             Post.objects.filter(
                 text=new_text,
-                image='posts/small.gif'
+                image=self.image_name
             ).exists()
         )
 
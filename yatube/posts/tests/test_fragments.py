@@ -0,0 +1,95 @@
+import time
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from posts import fragments
+
+
+class FragmentCacheTestCase(SimpleTestCase):
+    """Класс для проверки кэша фрагментов лент."""
+
+    def setUp(self):
+        cache.clear()
+        fragments.reset_stats()
+        self.key = fragments.make_key('test', ['/'])
+        self.renders = []
+
+    def render(self, html='html'):
+        def render():
+            self.renders.append(html)
+            return html
+        return render
+
+    def test_miss_then_hit(self):
+        first = fragments.get_or_render(self.key, '1', self.render())
+        second = fragments.get_or_render(self.key, '1', self.render())
+
+        self.assertEqual((first, second), ('html', 'html'))
+        self.assertEqual(len(self.renders), 1)
+        self.assertEqual(fragments.stats(),
+                         {'hit': 1, 'miss': 1, 'stale': 0, 'lock_wait': 0})
+
+    def test_new_version_is_rendered(self):
+        fragments.get_or_render(self.key, '1', self.render('old'))
+
+        html = fragments.get_or_render(self.key, '2', self.render('new'))
+
+        self.assertEqual(html, 'new')
+
+    def test_stale_while_other_worker_renders(self):
+        """Пока пересчёт занят другим воркером, отдаётся старая запись."""
+        fragments.get_or_render(self.key, '1', self.render('old'))
+        cache.add(f'{self.key}:lock', 1)
+
+        html = fragments.get_or_render(self.key, '2', self.render('new'))
+
+        self.assertEqual(html, 'old')
+        self.assertEqual(self.renders, ['old'])
+        self.assertEqual(fragments.stats()['stale'], 1)
+
+    @mock.patch.object(fragments, 'LOCK_WAIT', 0.1)
+    def test_waits_for_other_worker(self):
+        """Без записи ждём чужой пересчёт, а не рендерим все разом."""
+        cache.add(f'{self.key}:lock', 1)
+
+        def sleep(seconds):
+            cache.set(self.key, ('1', 'theirs', 0, 0))
+
+        with mock.patch.object(fragments.time, 'sleep', sleep):
+            html = fragments.get_or_render(self.key, '1', self.render())
+
+        self.assertEqual(html, 'theirs')
+        self.assertEqual(self.renders, [])
+        self.assertEqual(fragments.stats()['lock_wait'], 1)
+
+    def test_early_recompute(self):
+        """XFetch пересчитывает запись до срока, если рендер долгий."""
+        # До срока секунда, а последний рендер шёл десять.
+        cache.set(self.key, ('1', 'old', time.time() + 1, 10))
+
+        with mock.patch.object(fragments.random, 'random',
+                               return_value=0.9):
+            html = fragments.get_or_render(self.key, '1', self.render())
+
+        self.assertEqual(html, 'html')
+        self.assertEqual(fragments.stats()['miss'], 1)
+
+    def test_stats_command(self):
+        fragments.count('hit')
+        out = StringIO()
+
+        call_command('feed_cache_stats', '--reset', stdout=out)
+
+        self.assertIn('hit: 1', out.getvalue())
+        self.assertEqual(fragments.stats()['hit'], 0)
+
+    def test_counts_are_flushed_in_batches(self):
+        with mock.patch.object(fragments.cache, 'incr') as incr:
+            for _ in range(3):
+                fragments.count('hit')
+            incr.assert_not_called()
+
+        self.assertEqual(fragments.stats()['hit'], 3)
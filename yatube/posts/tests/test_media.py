@@ -0,0 +1,154 @@
+import hashlib
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+from posts import media, thumbnails
+from posts.models import ImageVariant, MediaBlob, Post
+from posts.storage import image_storage, is_content_name
+
+from .test_thumbnails import SMALL_GIF
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+User = get_user_model()
+
+
+def make_gif(color):
+    buffer = BytesIO()
+    Image.new('RGB', (2, 1), color).save(buffer, 'GIF')
+    return buffer.getvalue()
+
+
+OTHER_GIF = make_gif((0, 0, 255))
+
+
+def content_name(content, extension='.gif'):
+    digest = hashlib.sha256(content).hexdigest()
+    return f'posts/{digest[:2]}/{digest}{extension}'
+
+
+def refs(name):
+    return MediaBlob.objects.filter(pk=name).values_list(
+        'refs', flat=True).first()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class ContentAddressedStorageTestCase(TestCase):
+    """Класс для проверки хранилища картинок по содержимому."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='Anna')
+
+    def create(self, content=SMALL_GIF, name='meme.gif'):
+        return Post.objects.create(
+            author=self.user, text='text',
+            image=SimpleUploadedFile(name, content, 'image/gif'))
+
+    def test_same_content_stored_once(self):
+        first = self.create(name='meme.gif')
+        second = self.create(name='copy.GIF')
+        self.assertEqual(first.image.name, content_name(SMALL_GIF))
+        self.assertEqual(second.image.name, first.image.name)
+        self.assertEqual(
+            image_storage.listdir(f'posts/{first.image.name[6:8]}')[1],
+            [first.image.name.rsplit('/', 1)[1]])
+        self.assertEqual(refs(first.image.name), 2)
+        self.assertTrue(is_content_name(first.image.name))
+        self.assertFalse(is_content_name('posts/meme.gif'))
+
+    def test_concurrent_upload_keeps_content_name(self):
+        name = self.create().image.name
+        # Вторая загрузка не видит файл, который уже записала первая.
+        exists, checked = image_storage.exists, []
+
+        def racing_exists(path):
+            if path == name and not checked:
+                checked.append(path)
+                return False
+            return exists(path)
+
+        with mock.patch.object(image_storage, 'exists', racing_exists):
+            saved = image_storage.save('posts/race.gif',
+                                       ContentFile(SMALL_GIF))
+
+        self.assertEqual(saved, name)
+        self.assertEqual(
+            image_storage.listdir(f'posts/{name[6:8]}')[1],
+            [name.rsplit('/', 1)[1]])
+
+    def test_different_content_stored_apart(self):
+        first = self.create(SMALL_GIF)
+        second = self.create(OTHER_GIF)
+        self.assertNotEqual(first.image.name, second.image.name)
+
+    def test_refs_follow_edits_and_deletes(self):
+        post = self.create(SMALL_GIF)
+        old_name = post.image.name
+        post = Post.objects.get(pk=post.pk)
+        post.image = SimpleUploadedFile('new.gif', OTHER_GIF, 'image/gif')
+        post.save()
+        self.assertEqual((refs(old_name), refs(post.image.name)), (0, 1))
+        post.delete()
+        self.assertEqual(refs(post.image.name), 0)
+
+    def test_collect_deletes_only_unreferenced_files(self):
+        kept = self.create(SMALL_GIF)
+        gone = self.create(OTHER_GIF)
+        thumbnails.generate(gone.image.name)
+        self.assertTrue(ImageVariant.objects.filter(
+            source=gone.image.name).exists())
+        gone.delete()
+        self.assertEqual(media.collect(), [gone.image.name])
+        self.assertFalse(image_storage.exists(gone.image.name))
+        self.assertFalse(ImageVariant.objects.filter(
+            source=gone.image.name).exists())
+        self.assertTrue(image_storage.exists(kept.image.name))
+        self.assertFalse(MediaBlob.objects.filter(
+            pk=gone.image.name).exists())
+
+    def test_thumbnails_reused_for_same_content(self):
+        first = self.create()
+        thumbnails.enqueue(first.image.name)
+        self.assertTrue(thumbnails.is_built(first.image.name))
+        second = self.create(name='copy.gif')
+        with mock.patch('posts.thumbnails.generate') as generate:
+            thumbnails.enqueue(second.image.name)
+        generate.assert_not_called()
+
+    def test_dedupe_media_moves_legacy_files(self):
+        names = [default_storage.save(f'posts/{name}.gif',
+                                      ContentFile(SMALL_GIF))
+                 for name in ('first', 'second')]
+        posts = [self.create() for _ in names]
+        for post, name in zip(posts, names):
+            Post.objects.filter(pk=post.pk).update(image=name)
+        MediaBlob.objects.all().delete()
+        out = StringIO()
+
+        call_command('dedupe_media', workers=1, stdout=out)
+
+        name = content_name(SMALL_GIF)
+        self.assertEqual(
+            set(Post.objects.values_list('image', flat=True)), {name})
+        self.assertEqual(refs(name), 2)
+        for legacy in names:
+            self.assertFalse(default_storage.exists(legacy))
+        self.assertTrue(thumbnails.is_built(name))
+        self.assertIn('Перенесено файлов: 2, из них уникальных: 1',
+                      out.getvalue())
@@ -1,6 +1,11 @@
+from unittest import skipUnless
+
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection
 from django.test import TestCase
-from posts.models import Group, Post
+from django.utils import timezone
+from posts.models import Comment, Follow, Group, Post
+from posts.utils import FeedSource
 
 User = get_user_model()
 
@@ -32,3 +37,59 @@ class PostModelTest(TestCase):
         expected_group_name = group_name.title
 
         self.assertEqual(expected_group_name, str(group_name))
+
+
+class FollowModelTest(TestCase):
+    """Class for testing model Follow."""
+
+    def test_follow_is_unique(self):
+        """Повторная подписка на того же автора не сохраняется."""
+        user = User.objects.create_user(username='auth')
+        author = User.objects.create_user(username='author')
+        Follow.objects.create(user=user, author=author)
+
+        with self.assertRaises(IntegrityError):
+            Follow.objects.create(user=user, author=author)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'План запроса в формате SQLite')
+class FeedIndexTest(TestCase):
+    """Каждый запрос ленты идёт по своему индексу и без сортировки."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(title='group', slug='group',
+                                         description='')
+
+    def assertUsesIndex(self, source, index):
+        cursors = (None, (timezone.now(), 1))
+        for cursor in cursors:
+            for reverse in (False, True):
+                with self.subTest(source=source.name, cursor=cursor,
+                                  reverse=reverse):
+                    plan = source.queryset(cursor, reverse)[:11].explain()
+
+                    self.assertIn(f'USING INDEX {index}', plan)
+                    self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_feed_queries_use_indexes(self):
+        sources = {
+            'post_pub_date_idx': FeedSource('index',
+                                            Post.objects.for_feed()),
+            'post_group_pub_date_idx': FeedSource(
+                'group', self.group.post_group.for_feed()),
+            'post_author_pub_date_idx': FeedSource(
+                'profile', Post.objects.for_feed().filter(author=self.user)),
+            'inbox_user_pub_date_idx': FeedSource(
+                'follow', self.user.inbox.for_feed(), ('pub_date', 'post_id')),
+        }
+        for index, source in sources.items():
+            self.assertUsesIndex(source, index)
+
+    def test_comments_use_index(self):
+        post = Post.objects.create(author=self.user, text='text')
+        plan = Comment.objects.filter(post=post).order_by('created').explain()
+
+        self.assertIn('USING INDEX comment_post_created_idx', plan)
@@ -0,0 +1,76 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts import follows
+from posts.models import Follow, Suggestion
+
+User = get_user_model()
+
+
+class RecommendationsTestCase(TestCase):
+    """Класс для проверки рекомендаций «Кого почитать»."""
+
+    def setUp(self):
+        cache.clear()
+        self.users = {name: User.objects.create(username=name)
+                      for name in ('reader', 'other', 'a', 'b', 'c', 'd',
+                                   'e', 'f')}
+        for user, author in (('reader', 'a'), ('reader', 'b'),
+                             ('a', 'c'), ('b', 'c'), ('b', 'd'),
+                             ('other', 'a'), ('other', 'b'),
+                             ('other', 'e'), ('c', 'f')):
+            Follow.objects.create(user=self.users[user],
+                                  author=self.users[author])
+        self.client = Client()
+        self.client.force_login(self.users['reader'])
+
+    def suggested(self, name='reader'):
+        return list(Suggestion.objects.filter(
+            user=self.users[name]).values_list('author__username', 'score'))
+
+    def test_recompute(self):
+        out = StringIO()
+
+        call_command('recommend', stdout=out)
+
+        # c читают два автора из подписок, d — один, e — похожий читатель.
+        self.assertEqual(self.suggested(),
+                         [('c', 2.0), ('d', 1.0), ('e', 1.0)])
+        self.assertIn('Рекомендаций сохранено:', out.getvalue())
+
+    def test_follow_updates_suggestions(self):
+        call_command('recommend', stdout=StringIO())
+
+        follows.follow(self.users['reader'],
+                       User.objects.filter(username='c'))
+
+        self.assertEqual(self.suggested(),
+                         [('d', 1.0), ('e', 1.0), ('f', 1.0)])
+
+    def test_shown_on_follow_index_and_own_profile(self):
+        call_command('recommend', stdout=StringIO())
+        pages = {
+            reverse('posts:follow_index'): True,
+            reverse('posts:profile', kwargs={'username': 'reader'}): True,
+            reverse('posts:profile', kwargs={'username': 'a'}): False,
+        }
+        for url, shown in pages.items():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                suggestions = [author.username
+                               for author in response.context['suggestions']]
+                self.assertEqual(suggestions, ['c', 'd', 'e'] if shown
+                                 else [])
+
+    def test_recompute_invalidates_follow_index(self):
+        url = reverse('posts:follow_index')
+        etag = self.client.get(url)['ETag']
+
+        call_command('recommend', stdout=StringIO())
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertContains(response, 'Кого почитать')
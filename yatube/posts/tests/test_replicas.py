@@ -0,0 +1,78 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+from contextlib import closing
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.test import Client, TransactionTestCase
+from django.urls import reverse
+from posts import generations
+from posts.models import Group, Inbox, Post
+
+User = get_user_model()
+
+
+class ReplicateTestCase(TransactionTestCase):
+    """Класс для проверки команды replicate и журнала поколений.
+
+    Без транзакции теста: backup ждёт, пока основная база её завершит.
+    """
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.name = os.path.join(directory, 'replica.sqlite3')
+        patcher = mock.patch.dict(connections['replica'].settings_dict,
+                                  NAME=self.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_copies_primary(self):
+        Group.objects.create(title='Группа', slug='group')
+        out = StringIO()
+
+        call_command('replicate', stdout=out)
+
+        with closing(sqlite3.connect(self.name)) as replica:
+            self.assertEqual(replica.execute(
+                'SELECT slug FROM posts_group').fetchall(), [('group',)])
+        self.assertIn('Обновлено реплик: 1.', out.getvalue())
+
+    def test_bumps_are_replayed_after_copy(self):
+        call_command('replicate', stdout=StringIO())
+        scope = generations.group(1)
+        generations.bump(scope)
+        version = generations.get(scope)
+        other = generations.get(generations.INDEX)
+
+        call_command('replicate', stdout=StringIO())
+
+        self.assertNotEqual(generations.get(scope), version)
+        self.assertEqual(generations.get(generations.INDEX), other)
+        # Повторно уже воспроизведённые bump не повторяются.
+        version = generations.get(scope)
+        call_command('replicate', stdout=StringIO())
+        self.assertEqual(generations.get(scope), version)
+
+    def test_follow_reads_primary_after_write(self):
+        reader = User.objects.create(username='reader')
+        author = User.objects.create(username='author')
+        client = Client()
+        client.force_login(reader)
+        call_command('replicate', stdout=StringIO())
+        for x in range(3):
+            Post.objects.create(text=f'text{x}', author=author)
+
+        client.get(reverse('posts:profile_follow',
+                           kwargs={'username': 'author'}))
+
+        self.assertEqual(Inbox.objects.using('default').filter(
+            user=reader).count(), 3)
@@ -0,0 +1,103 @@
+from django.contrib.admin.sites import site
+from django.contrib.auth import get_user_model
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from posts import search
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+class SearchTestCase(TestCase):
+    """Класс для проверки поиска (FTS5, если доступен)."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='Anna')
+        cls.best = Post.objects.create(
+            text='Ёжик ёжик в тумане', author=cls.user)
+        cls.other = Post.objects.create(
+            text='Туман над рекой и ёжик', author=cls.user)
+        cls.commented = Post.objects.create(text='Про лошадь',
+                                            author=cls.user)
+        cls.comment = Comment.objects.create(
+            post=cls.commented, author=cls.user, text='Там был ежик')
+        for x in range(12):
+            Post.objects.create(text=f'ёжик номер {x}', author=cls.user)
+
+    def setUp(self):
+        self.client = Client()
+        self.url = reverse('posts:search')
+
+    def results(self, query, params=''):
+        response = self.client.get(f'{self.url}?q={query}&{params}')
+        return response.context['page_obj']
+
+    def test_ranked_results(self):
+        """Совпадения в посте и в комментариях, лучшие первыми."""
+        page_obj = self.results('ежик туман')
+
+        self.assertEqual(list(page_obj), [self.best, self.other])
+
+    def test_comment_finds_post(self):
+        self.assertIn(self.commented, list(self.results('там был')))
+
+    def test_cursor_pages(self):
+        first = self.results('ежик')
+        second = self.client.get(
+            f'{self.url}?{first.next_query}').context['page_obj']
+
+        found = list(first) + list(second)
+        self.assertFalse(second.has_next())
+        self.assertEqual(len(found), 15)
+        self.assertEqual(len(set(found)), 15)
+        self.assertEqual(found[0], self.best)
+
+    def test_search_cursor_on_feed_returns_first_page(self):
+        cursor = self.results('ежик').next_cursor
+
+        response = self.client.get(reverse('posts:index'),
+                                   {'after': cursor})
+
+        self.assertEqual(response.context['page_obj'].number, 1)
+
+    def test_index_follows_changes(self):
+        """Индекс обновляется при сохранении и удалении."""
+        post = Post.objects.get(pk=self.best.pk)
+        post.text = 'Слон'
+        post.save()
+        Comment.objects.get(pk=self.comment.pk).delete()
+
+        self.assertEqual(list(self.results('слон')), [post])
+        self.assertNotIn(self.commented, list(self.results('там был')))
+        post.delete()
+        self.assertEqual(list(self.results('слон')), [])
+
+    def test_empty_query(self):
+        self.assertEqual(list(self.results('')), [])
+        self.assertEqual(list(self.results('"*')), [])
+
+    def test_admin_search(self):
+        request = RequestFactory().get('/')
+        post_admin = site._registry[Post]
+        comment_admin = site._registry[Comment]
+
+        posts, _ = post_admin.get_search_results(
+            request, Post.objects.all(), 'туман ежик')
+        comments, _ = comment_admin.get_search_results(
+            request, Comment.objects.all(), 'ежик')
+
+        self.assertCountEqual(posts, [self.best, self.other])
+        self.assertEqual(list(comments), [self.comment])
+
+
+@override_settings(SEARCH_BACKEND='python')
+class PythonSearchTestCase(SearchTestCase):
+    """Те же проверки для запасного индекса SearchTerm."""
+
+    def test_rebuild(self):
+        search.rebuild()
+
+        self.assertEqual(list(self.results('ежик туман')),
+                         [self.best, self.other])
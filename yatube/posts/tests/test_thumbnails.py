@@ -0,0 +1,208 @@
+import shutil
+import tempfile
+from concurrent.futures import Future
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from posts import thumbnails
+from posts import variants as posts_variants
+from posts.models import ImageVariant, Post
+from sorl.thumbnail import get_thumbnail
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+User = get_user_model()
+
+SMALL_GIF = (b'\x47\x49\x46\x38\x39\x61\x02\x00'
+             b'\x01\x00\x80\x00\x00\x00\x00\x00'
+             b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+             b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+             b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+             b'\x0A\x00\x3B')
+
+
+class InlineExecutor:
+    """Пул, который выполняет задачу сразу, в том же процессе."""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, func, *args):
+        self.submitted.append(args)
+        future = Future()
+        future.set_result(func(*args))
+        return future
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=2)
+class ThumbnailPipelineTestCase(TestCase):
+    """Класс для проверки фоновой генерации миниатюр."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='Anna')
+        self.post = Post.objects.create(
+            author=self.user, text='text',
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'))
+        self.geometry, self.options = thumbnails.GEOMETRIES[0]
+        self.pool = InlineExecutor()
+        patcher = mock.patch.object(thumbnails, 'executor',
+                                    lambda: self.pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def thumbnail(self):
+        return get_thumbnail(self.post.image, self.geometry, **self.options)
+
+    def test_render_does_not_build_thumbnail(self):
+        """Пока миниатюры нет, рендер получает заглушку и ставит задачу."""
+        with mock.patch.object(self.pool, 'submit') as submit, \
+                mock.patch.object(thumbnails.transaction, 'on_commit',
+                                  lambda func: func()):
+            thumbnail = self.thumbnail()
+
+        self.assertIsInstance(thumbnail, thumbnails.Placeholder)
+        self.assertEqual((thumbnail.width, thumbnail.height), (960, 339))
+        submit.assert_called_once_with(thumbnails.generate,
+                                       self.post.image.name)
+
+    def test_queued_job_builds_thumbnail(self):
+        thumbnails.enqueue(self.post.image.name)
+
+        thumbnail = self.thumbnail()
+
+        self.assertNotIsInstance(thumbnail, thumbnails.Placeholder)
+        self.assertTrue(thumbnail.exists())
+        self.assertEqual(self.pool.submitted, [(self.post.image.name,)])
+
+    def test_duplicate_jobs_are_skipped(self):
+        cache.add(thumbnails._job_key(self.post.image.name), 1)
+
+        thumbnails.enqueue(self.post.image.name)
+
+        self.assertEqual(self.pool.submitted, [])
+
+    @override_settings(THUMBNAIL_WORKERS=0)
+    def test_without_workers_builds_inline(self):
+        self.assertTrue(self.thumbnail().exists())
+
+    def test_regenerate_command(self):
+        call_command('regenerate_thumbnails', '--workers', '1',
+                     stdout=StringIO())
+
+        self.assertNotIsInstance(self.thumbnail(), thumbnails.Placeholder)
+        out = StringIO()
+        call_command('regenerate_thumbnails', '--workers', '1', '--force',
+                     stdout=out)
+        self.assertIn('1', out.getvalue())
+        self.assertNotIsInstance(self.thumbnail(), thumbnails.Placeholder)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class BatchedThumbnailLookupTestCase(TestCase):
+    """Класс для проверки пакетного поиска миниатюр страницы."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Одинаковые картинки других тестов хранятся под тем же именем:
+        # их записи kvstore в кэше не должны подменить сборку ниже.
+        cache.clear()
+        cls.user = User.objects.create(username='Anna')
+        for x in range(settings.COUNT_POSTS):
+            post = Post.objects.create(
+                author=cls.user, text=f'text{x}',
+                image=SimpleUploadedFile(f'small{x}.gif', SMALL_GIF,
+                                         'image/gif'))
+            thumbnails.generate(post.image.name)
+        Post.objects.create(author=cls.user, text='без картинки')
+        # Без вариантов srcset лента показывает обычные миниатюры.
+        ImageVariant.objects.all().delete()
+
+    def setUp(self):
+        cache.clear()
+        self.posts = list(Post.objects.all())
+
+    def test_one_query_per_page(self):
+        """Холодный кэш — один запрос к kvstore, тёплый — ни одного."""
+        with self.assertNumQueries(1):
+            thumbnails.resolve(self.posts)
+        posts = list(Post.objects.all())
+        with self.assertNumQueries(0):
+            thumbnails.resolve(posts)
+
+        expected = {
+            post.pk: get_thumbnail(post.image, thumbnails.FEED_GEOMETRY,
+                                   **thumbnails.FEED_OPTIONS).url
+            for post in self.posts if post.image
+        }
+        self.assertEqual(
+            {post.pk: post.thumbnail.url
+             for post in self.posts if post.thumbnail}, expected)
+
+    def test_feed_uses_resolved_urls(self):
+        response = self.client.get(reverse('posts:index'))
+
+        post = Post.objects.exclude(image='').first()
+        thumbnail = get_thumbnail(post.image, thumbnails.FEED_GEOMETRY,
+                                  **thumbnails.FEED_OPTIONS)
+        self.assertContains(response, f'src="{thumbnail.url}"')
+
+
+def make_jpeg(size=(1200, 800)):
+    buffer = BytesIO()
+    Image.new('RGB', size, (200, 100, 50)).save(buffer, 'JPEG')
+    return SimpleUploadedFile('photo.jpg', buffer.getvalue(), 'image/jpeg')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class ImageVariantTestCase(TestCase):
+    """Класс для проверки вариантов картинок для srcset."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='Anna')
+        self.post = Post.objects.create(author=self.user, text='text',
+                                        image=make_jpeg())
+        thumbnails.generate(self.post.image.name)
+
+    def test_variants_built_with_dimensions(self):
+        variants = ImageVariant.objects.filter(source=self.post.image.name)
+        supported = [extension for extension, *_ in
+                     posts_variants.formats()]
+
+        self.assertEqual(
+            sorted((variant.format, variant.width, variant.height)
+                   for variant in variants),
+            sorted((extension, width, round(width * 339 / 960))
+                   for width in settings.IMAGE_VARIANT_WIDTHS
+                   for extension in supported))
+        for variant in variants:
+            self.assertEqual(variant.file.size, variant.size)
+
+    def test_feed_renders_picture(self):
+        response = self.client.get(reverse('posts:index'))
+
+        self.assertContains(response, '<picture>')
+        self.assertContains(response, 'loading="lazy"')
+        self.assertContains(response, 'width="960" height="339"')
+        self.assertContains(response, ' 480w, ')
+
+    def test_report(self):
+        out = StringIO()
+
+        call_command('image_report', '--pages', '1', stdout=out)
+
+        self.assertIn('desktop saved', out.getvalue())
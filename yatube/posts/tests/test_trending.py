@@ -0,0 +1,91 @@
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts import trending
+from posts.models import Comment, Group, Post, TrendBucket
+
+User = get_user_model()
+
+
+class TrendingTestCase(TestCase):
+    """Класс для проверки «Популярного»."""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username='author')
+        self.cats = Group.objects.create(title='Коты', slug='cats')
+        self.dogs = Group.objects.create(title='Собаки', slug='dogs')
+        self.post = Post.objects.create(text='Кот', author=self.author,
+                                        group=self.cats)
+        self.other = Post.objects.create(text='Пёс', author=self.author,
+                                         group=self.dogs)
+        self.now = trending.current_bucket() * settings.TRENDING_BUCKET
+        self.client = Client()
+
+    def add(self, kind, object_id, age, comments=0, posts=0):
+        TrendBucket.objects.update_or_create(
+            kind=kind, object_id=object_id,
+            bucket=trending.current_bucket(self.now) - age,
+            defaults={'comments': comments, 'posts': posts})
+
+    def test_signals_count_activity(self):
+        Comment.objects.create(post=self.post, author=self.author, text='1')
+        Comment.objects.create(post=self.post, author=self.author, text='2')
+
+        self.assertEqual(
+            TrendBucket.objects.get(kind=TrendBucket.POST,
+                                    object_id=self.post.pk).comments, 2)
+        group = TrendBucket.objects.get(kind=TrendBucket.GROUP,
+                                        object_id=self.cats.pk)
+        self.assertEqual((group.comments, group.posts), (2, 1))
+
+    def test_recent_activity_ranks_higher(self):
+        TrendBucket.objects.all().delete()
+        # Десять старых комментариев за два периода полураспада стоят
+        # меньше четырёх свежих.
+        self.add(TrendBucket.POST, self.post.pk,
+                 2 * settings.TRENDING_HALF_LIFE, comments=10)
+        self.add(TrendBucket.POST, self.other.pk, 0, comments=4)
+        self.add(TrendBucket.GROUP, self.cats.pk, 0, comments=2)
+        self.add(TrendBucket.GROUP, self.dogs.pk, 0, posts=1)
+
+        self.assertEqual(trending.refresh(self.now), (2, 2))
+
+        self.assertEqual(trending.posts(), [self.other, self.post])
+        self.assertEqual([group['slug'] for group in trending.groups()],
+                         ['dogs', 'cats'])
+
+    def test_old_buckets_pruned(self):
+        TrendBucket.objects.all().delete()
+        self.add(TrendBucket.POST, self.post.pk, settings.TRENDING_WINDOW,
+                 comments=100)
+        self.add(TrendBucket.POST, self.other.pk, 1, comments=1)
+
+        trending.refresh(self.now)
+
+        self.assertEqual(trending.posts(), [self.other])
+        self.assertEqual(TrendBucket.objects.count(), 1)
+
+    def test_pages(self):
+        TrendBucket.objects.all().delete()
+        self.add(TrendBucket.POST, self.other.pk, 0, comments=2)
+        self.add(TrendBucket.POST, self.post.pk, 0, comments=1)
+        self.add(TrendBucket.GROUP, self.cats.pk, 0, comments=1)
+        out = StringIO()
+        call_command('trending', stdout=out)
+
+        response = self.client.get(reverse('posts:trending'))
+        self.assertEqual(response.context['posts'], [self.other, self.post])
+        self.assertContains(response, 'Коты')
+        self.assertIn('Популярных постов: 2, групп: 1.', out.getvalue())
+
+        # Виджет групп читается из кэша: запрос только за страницей постов.
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, reverse('posts:group_list',
+                                              kwargs={'slug': 'cats'}))
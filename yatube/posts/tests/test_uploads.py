@@ -0,0 +1,146 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from posts import uploads
+from posts.forms import PostForm
+from posts.models import Post
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+User = get_user_model()
+
+ORIENTATION = 0x0112
+
+
+def image_bytes(size=(60, 40), image_format='JPEG', noise=False, **options):
+    if noise:
+        image = Image.frombytes('RGB', size, os.urandom(size[0] * size[1] * 3))
+    else:
+        image = Image.new('RGB', size, (200, 100, 50))
+    buffer = BytesIO()
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def upload(content, name='photo.jpg', content_type='image/jpeg'):
+    return SimpleUploadedFile(name, content, content_type)
+
+
+def clean_image(content, name='photo.jpg'):
+    form = PostForm({'text': 'text'}, {'image': upload(content, name)})
+    form.is_valid()
+    return form
+
+
+@override_settings(IMAGE_UPLOAD_MAX_BYTES=10)
+class LimitedUploadHandlerTestCase(SimpleTestCase):
+    """Класс для проверки ограничения размера при приёме файла."""
+
+    def receive(self, *chunks):
+        handler = uploads.LimitedUploadHandler()
+        handler.new_file('image', 'photo.jpg', 'image/jpeg', None)
+        passed = [handler.receive_data_chunk(chunk, 0) for chunk in chunks]
+        return passed, handler.file_complete(sum(map(len, chunks)))
+
+    def test_small_file_goes_to_next_handlers(self):
+        passed, uploaded = self.receive(b'12345', b'67890')
+        self.assertEqual(passed, [b'12345', b'67890'])
+        self.assertIsNone(uploaded)
+
+    def test_big_file_is_dropped(self):
+        passed, uploaded = self.receive(b'12345', b'67890', b'1', b'2')
+        self.assertEqual(passed, [b'12345', b'67890', None, None])
+        self.assertIsInstance(uploaded, uploads.RejectedUpload)
+        self.assertEqual(uploaded.size, 12)
+        self.assertEqual(uploaded.read(), b'')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageUploadTestCase(TestCase):
+    """Класс для проверки проверки и нормализации картинок."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create(username='Anna')
+        self.client.force_login(self.user)
+
+    @override_settings(IMAGE_UPLOAD_MAX_BYTES=4096)
+    def test_huge_file_rejected_while_uploading(self):
+        content = image_bytes((200, 200), noise=True)
+        self.assertGreater(len(content), 4096)
+        response = self.client.post(reverse('posts:post_create'), {
+            'text': 'text', 'image': upload(content)})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Файл слишком большой',
+                      response.context['form'].errors['image'][0])
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(IMAGE_MAX_PIXELS=100)
+    def test_too_many_pixels_rejected(self):
+        form = clean_image(image_bytes((20, 20), 'PNG'), 'photo.png')
+        self.assertTrue(form.has_error('image', 'image_too_large'))
+
+    def test_malformed_file_rejected(self):
+        form = clean_image(b'definitely not an image')
+        self.assertFalse(form.is_valid())
+        self.assertIn('image', form.errors)
+
+    def test_truncated_file_rejected(self):
+        content = image_bytes((200, 200), noise=True)
+        form = clean_image(content[:len(content) // 2])
+        self.assertTrue(form.has_error('image', 'invalid_image'))
+
+    def test_unsupported_format_rejected(self):
+        form = clean_image(image_bytes(image_format='BMP'), 'photo.bmp')
+        self.assertTrue(form.has_error('image', 'invalid_image'))
+
+    def test_exif_stripped_and_orientation_applied(self):
+        exif = Image.Exif()
+        exif[ORIENTATION] = 6
+        form = clean_image(image_bytes((60, 40), exif=exif.tobytes()))
+        self.assertTrue(form.is_valid(), form.errors)
+        image = Image.open(form.cleaned_data['image'])
+        self.assertEqual(image.size, (40, 60))
+        self.assertNotIn('exif', image.info)
+
+    @override_settings(IMAGE_MAX_DIMENSION=32)
+    def test_oversized_image_downscaled(self):
+        form = clean_image(image_bytes((100, 50), 'PNG'), 'photo.png')
+        self.assertTrue(form.is_valid(), form.errors)
+        image = Image.open(form.cleaned_data['image'])
+        self.assertEqual((image.format, image.size), ('PNG', (32, 16)))
+
+    @override_settings(IMAGE_MAX_DIMENSION=32)
+    def test_oversized_gif(self):
+        form = clean_image(image_bytes((100, 50), 'GIF'), 'photo.gif')
+        self.assertTrue(form.is_valid(), form.errors)
+        image = Image.open(form.cleaned_data['image'])
+        self.assertEqual((image.format, image.size), ('GIF', (32, 16)))
+
+        frames = [Image.new('RGB', (100, 50), color)
+                  for color in ('red', 'blue')]
+        buffer = BytesIO()
+        frames[0].save(buffer, 'GIF', save_all=True,
+                       append_images=frames[1:])
+        form = clean_image(buffer.getvalue(), 'anim.gif')
+        self.assertTrue(form.has_error('image', 'image_too_large'))
+
+    def test_plain_image_saved_as_is(self):
+        content = image_bytes()
+        response = self.client.post(reverse('posts:post_create'), {
+            'text': 'text', 'image': upload(content)})
+        self.assertEqual(response.status_code, 302)
+        post = Post.objects.get()
+        with post.image.open() as file:
+            self.assertEqual(file.read(), content)
@@ -0,0 +1,95 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from posts.models import Post
+from posts.utils import get_paginator, page_window
+
+User = get_user_model()
+
+
+class CursorPaginatorTestCase(TestCase):
+    """Класс для проверки курсорной пагинации."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.factory = RequestFactory()
+        cls.user = User.objects.create(username='Anna')
+        for x in range(25):
+            Post.objects.create(text=f'text{x}', author=cls.user)
+        # Одинаковые даты: порядок внутри них задаёт id.
+        Post.objects.filter(pk__lte=cls.user.post_author.order_by(
+            'pk')[5].pk).update(pub_date=timezone.now())
+
+    def get_page(self, query=''):
+        return get_paginator(Post.objects.all(),
+                             self.factory.get(f'/?{query}'))
+
+    def test_walk_forward_and_back(self):
+        """Курсоры проходят ленту целиком в обе стороны без повторов."""
+        expected = list(Post.objects.order_by('-pub_date', '-pk'))
+        pages = [self.get_page()]
+        while pages[-1].has_next():
+            pages.append(self.get_page(pages[-1].next_query))
+
+        self.assertEqual([page.number for page in pages], [1, 2, 3])
+        self.assertEqual(
+            [post for page in pages for post in page.object_list], expected)
+
+        back = self.get_page(pages[-1].previous_query)
+        self.assertEqual(back.number, 2)
+        self.assertEqual(back.object_list, pages[1].object_list)
+        first = self.get_page(back.previous_query)
+        self.assertEqual(first.number, 1)
+        self.assertFalse(first.has_previous())
+        self.assertEqual(len(first), settings.COUNT_POSTS)
+
+    def test_first_page_without_count_and_offset(self):
+        """Первая страница — один запрос без COUNT и OFFSET."""
+        request = self.factory.get('/')
+        with self.assertNumQueries(1) as ctx:
+            page_obj = get_paginator(Post.objects.all(), request)
+            list(page_obj)
+        sql = ctx.captured_queries[0]['sql'].upper()
+        self.assertNotIn('COUNT(', sql)
+        self.assertNotIn('OFFSET', sql)
+
+    def test_bad_cursor_returns_first_page(self):
+        """Поддельный курсор не ломает страницу."""
+        page_obj = self.get_page('after=forged')
+
+        self.assertEqual(page_obj.number, 1)
+        self.assertEqual(len(page_obj), settings.COUNT_POSTS)
+
+    def test_legacy_page_number(self):
+        """Старые ссылки ?page=N продолжают работать."""
+        page_obj = self.get_page('page=2')
+        following = self.get_page(page_obj.next_query)
+
+        self.assertEqual(page_obj.number, 2)
+        self.assertEqual(following.number, 3)
+        self.assertEqual(len(following), 5)
+        self.assertIn('page=3', page_obj.last_query)
+
+
+class PageWindowTestCase(TestCase):
+    """Класс для проверки оконного списка страниц."""
+
+    @override_settings(PAGINATOR_WINDOW=2)
+    def test_window_around_current_page(self):
+        """Первая, последняя и по две соседние страницы, между — пропуски."""
+        request = RequestFactory().get('/', {'page': 10})
+
+        window = page_window(request, 10, 10_000)
+
+        self.assertEqual([number for number, _ in window],
+                         [1, None, 8, 9, 10, 11, 12, None, 10_000])
+        self.assertEqual(window[-1][1], 'page=10000')
+
+    def test_window_without_gaps(self):
+        request = RequestFactory().get('/')
+
+        window = page_window(request, 1, 2)
+
+        self.assertEqual([number for number, _ in window], [1, 2])
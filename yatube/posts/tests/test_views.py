@@ -1,3 +1,4 @@
+import hashlib
 import shutil
 import tempfile
 from http import HTTPStatus
@@ -55,6 +56,9 @@ class PostPagesTests(TestCase):
                          b'\x00\x00\x00\x2C\x00\x00\x00\x00'
                          b'\x02\x00\x01\x00\x00\x02\x02\x0C'
                          b'\x0A\x00\x3B')
+        # Хранилище по содержимому называет файл по его sha256.
+        digest = hashlib.sha256(cls.small_gif).hexdigest()
+        cls.image_name = f'posts/{digest[:2]}/{digest}.gif'
 
         cls.uploaded = SimpleUploadedFile(
             name='small.gif',
@@ -97,7 +101,7 @@ class PostPagesTests(TestCase):
         response = self.authorized_client.get(url)
 
         self.assertEqual(response.context.get('one_post').image,
-                         'posts/small.gif')
+                         self.image_name)
 
     def test_pages_show_correct_image(self):
         """
@@ -112,7 +116,7 @@ class PostPagesTests(TestCase):
             response = self.authorized_client.get(url)
 
             for post in response.context['page_obj'].object_list:
-                self.assertEqual(post.image, 'posts/small.gif')
+                self.assertEqual(post.image, self.image_name)
 
 
 class IndexTestCase(TestCase):
@@ -374,13 +378,61 @@ class CacheTestCase(PostsBaseTest):
 
     def test_cache_index(self):
         response = self.authorized_client.get(self.url)
-        self.post.delete()
+        # update() не шлёт сигналов: поколение ленты прежнее.
+        Post.objects.filter(pk=self.post.pk).update(text='changed')
         new_response = self.authorized_client.get(self.url)
         self.assertEqual(response.content, new_response.content)
         cache.clear()
         new_response2 = self.authorized_client.get(self.url)
         self.assertNotEqual(response.content, new_response2.content)
 
+    def test_cache_invalidated_by_changes(self):
+        """Изменение поста, комментарий и подписка сбрасывают фрагменты."""
+        other = User.objects.create(username='Vadim')
+        other_client = Client()
+        other_client.force_login(other)
+        group = Group.objects.create(title='group', slug='group',
+                                     description='')
+        urls = {
+            'index': self.url,
+            'profile': reverse('posts:profile',
+                               kwargs={'username': self.user.username}),
+            'follow': reverse('posts:follow_index'),
+        }
+
+        def pages():
+            return {
+                name: (other_client if name == 'follow'
+                       else self.authorized_client).get(url).content
+                for name, url in urls.items()
+            }
+
+        changes = {
+            'follow': (
+                lambda: Follow.objects.create(user=other, author=self.user),
+                ['follow']),
+            'post': (
+                lambda: Post.objects.create(author=self.user, text='new'),
+                ['index', 'profile', 'follow']),
+            'comment': (
+                lambda: self.post.comments.create(author=other, text='first'),
+                ['index', 'profile', 'follow']),
+        }
+        for change, (apply, changed) in changes.items():
+            before = pages()
+            apply()
+            after = pages()
+            for name in changed:
+                with self.subTest(change=change, page=name):
+                    self.assertNotEqual(before[name], after[name])
+
+        group_url = reverse('posts:group_list', kwargs={'slug': group.slug})
+        before = self.authorized_client.get(group_url).content
+        self.post.group = group
+        self.post.save()
+        self.assertNotEqual(
+            before, self.authorized_client.get(group_url).content)
+
 
 class FollowTestCase(TestCase):
     """Класс для проверки сервиса подписок."""
@@ -448,3 +500,47 @@ class FollowTestCase(TestCase):
         response = self.authorized_client2.get(url)
 
         self.assertNotIn(post, response.context.get('page_obj').object_list)
+
+
+class FeedQueryBudgetTestCase(TestCase):
+    """Класс для проверки числа запросов к БД в лентах."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='Anna')
+        cls.author = User.objects.create(username='Vadim',
+                                         first_name='Вадим')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        for x in range(settings.COUNT_POSTS + 3):
+            Post.objects.create(text=f'text{x}', author=cls.author,
+                                group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_feed_query_budget(self):
+        """Число запросов не зависит от числа постов на странице."""
+        budgets = {
+            reverse('posts:index'): 3,
+            reverse('posts:group_list',
+                    kwargs={'slug': self.group.slug}): 4,
+            reverse('posts:profile',
+                    kwargs={'username': self.author.username}): 6,
+            # Подписки и блок «Кого почитать».
+            reverse('posts:follow_index'): 5,
+        }
+        for url, budget in budgets.items():
+            with self.subTest(url=url):
+                with self.assertNumQueries(budget):
+                    response = self.authorized_client.get(url)
+
+                self.assertEqual(len(response.context['page_obj']),
+                                 settings.COUNT_POSTS)
@@ -0,0 +1,236 @@
+"""Миниатюры постов готовятся заранее, в пуле процессов.
+
+post_create и post_edit ставят картинку в очередь (enqueue), воркеры
+пула строят миниатюры всех размеров из GEOMETRIES и варианты для
+srcset (posts.variants). Бэкенд PipelineBackend
+(THUMBNAIL_BACKEND) при рендере {% thumbnail %} только читает готовую
+миниатюру; если её ещё нет, ставит картинку в очередь и отдаёт заглушку,
+а не строит миниатюру посреди запроса.
+
+THUMBNAIL_WORKERS = 0 — старое поведение: миниатюры строятся сразу.
+"""
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE
+from sorl.thumbnail.kvstores.cached_db_kvstore import \
+    KVStore as CachedDBKVStore
+from sorl.thumbnail.models import KVStore as KVStoreModel
+from sorl.thumbnail.parsers import parse_geometry
+
+from . import generations, variants
+from .models import ImageVariant, Post
+from .storage import image_storage
+
+logger = logging.getLogger(__name__)
+
+# Все размеры, в которых шаблоны показывают Post.image.
+GEOMETRIES = (
+    ('960x339', {'crop': 'center', 'upscale': True}),
+)
+# Размер картинки в карточке поста в лентах.
+FEED_GEOMETRY, FEED_OPTIONS = GEOMETRIES[0]
+
+# Пока задача в работе, другие воркеры сайта её не дублируют.
+JOB_TIMEOUT = 5 * 60
+
+PLACEHOLDER_SVG = (
+    '<svg xmlns="http://www.w3.org/2000/svg" width="{width}" '
+    'height="{height}"><rect width="100%" height="100%" fill="#e9ecef"/>'
+    '</svg>'
+)
+
+_executor = None
+
+
+class Placeholder:
+    """Заглушка вместо миниатюры: серый прямоугольник того же размера."""
+
+    is_placeholder = True
+
+    def __init__(self, geometry_string):
+        self.width, self.height = parse_geometry(geometry_string)
+        self.url = 'data:image/svg+xml,' + quote(PLACEHOLDER_SVG.format(
+            width=self.width, height=self.height))
+
+    def exists(self):
+        return False
+
+
+class PipelineBackend(ThumbnailBackend):
+    """Бэкенд sorl-thumbnail, который не строит миниатюры при рендере."""
+
+    def thumbnail_file(self, file_, geometry_string, options):
+        """ImageFile миниатюры с теми же опциями, что в get_thumbnail."""
+        source = ImageFile(file_)
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return ImageFile(name, default.storage)
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        if not settings.THUMBNAIL_WORKERS or not file_:
+            return super().get_thumbnail(file_, geometry_string, **options)
+        thumbnail = default.kvstore.get(
+            self.thumbnail_file(file_, geometry_string, options))
+        if thumbnail:
+            return thumbnail
+        transaction.on_commit(partial(enqueue, getattr(file_, 'name', file_)))
+        return Placeholder(geometry_string)
+
+
+def _init_worker():
+    # Соединения с БД, унаследованные от родителя при fork, не годятся.
+    connections.close_all()
+
+
+def make_pool(workers):
+    return ProcessPoolExecutor(
+        workers,
+        mp_context=multiprocessing.get_context('fork'),
+        initializer=_init_worker,
+    )
+
+
+def executor():
+    global _executor
+    if _executor is None:
+        _executor = make_pool(settings.THUMBNAIL_WORKERS)
+    return _executor
+
+
+def source(name):
+    """Картинка поста name — с тем же хранилищем, что у Post.image."""
+    return ImageFile(name, image_storage)
+
+
+def is_built(name):
+    """Готовы ли миниатюры и варианты name.
+
+    У повторно загруженной картинки они уже есть: хранилище
+    по содержимому даёт ей то же имя.
+    """
+    backend = PipelineBackend()
+    return ImageVariant.objects.filter(source=name).exists() and all(
+        default.kvstore.get(backend.thumbnail_file(
+            source(name), geometry, dict(options)))
+        for geometry, options in GEOMETRIES)
+
+
+def generate(name):
+    """Миниатюры и варианты картинки name (в воркере пула или сразу)."""
+    backend = ThumbnailBackend()
+    for geometry, options in GEOMETRIES:
+        backend.get_thumbnail(source(name), geometry, **options)
+    variants.build(name)
+    # Фрагменты лент, отрендеренные с заглушкой, пора перестроить.
+    for post in Post.objects.filter(image=name).only('author', 'group'):
+        generations.bump(*generations.post_scopes(post))
+    return name
+
+
+def _job_key(name):
+    return f'thumbnail-job:{name}'
+
+
+def _done(future):
+    name = future.name
+    cache.delete(_job_key(name))
+    if future.exception() is not None:
+        logger.error('Не удалось построить миниатюры %s', name,
+                     exc_info=future.exception())
+
+
+def enqueue(name):
+    """Ставит картинку name в очередь; без пула строит миниатюры сразу."""
+    if not name or is_built(name):
+        return
+    if not settings.THUMBNAIL_WORKERS:
+        generate(name)
+        return
+    if not cache.add(_job_key(name), 1, JOB_TIMEOUT):
+        return
+    future = executor().submit(generate, name)
+    future.name = name
+    future.add_done_callback(_done)
+
+
+def regenerate(names, workers, force=False):
+    """Строит миниатюры картинок names в workers процессах.
+
+    force — сначала удалить готовые миниатюры. Отдаёт имена по мере
+    готовности.
+    """
+    if force:
+        for name in names:
+            default.kvstore.delete_thumbnails(source(name))
+    if workers < 2:
+        yield from map(generate, names)
+        return
+    with make_pool(workers) as pool:
+        yield from pool.map(generate, names, chunksize=8)
+
+
+def _kvstore_get_many(keys):
+    """Записи kvstore по ключам keys: один get_many кэша и один запрос.
+
+    Повторяет cached_db KVStore._get_raw, но сразу для всех ключей.
+    """
+    if not isinstance(default.kvstore, CachedDBKVStore):
+        found = (default.kvstore._get(key) for key in keys)
+        return {key: value for key, value in zip(keys, found) if value}
+    raw_keys = {add_prefix(key): key for key in keys}
+    kv_cache = default.kvstore.cache
+    values = kv_cache.get_many(list(raw_keys))
+    missing = [key for key in raw_keys if key not in values]
+    if missing:
+        rows = dict(KVStoreModel.objects.filter(key__in=missing)
+                    .values_list('key', 'value'))
+        # Отсутствие записи кэшируется так же, как в sorl.
+        fetched = {key: rows.get(key, EMPTY_VALUE) for key in missing}
+        kv_cache.set_many(fetched,
+                          thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT)
+        values.update(fetched)
+    return {
+        raw_keys[key]: deserialize_image_file(value)
+        for key, value in values.items() if value != EMPTY_VALUE
+    }
+
+
+def resolve(posts, geometry_string=FEED_GEOMETRY, options=FEED_OPTIONS):
+    """Проставляет post.thumbnail постам posts одним обращением к kvstore.
+
+    Вместо десятка {% thumbnail %} на страницу, каждый со своим запросом.
+    Миниатюра, которой ещё нет, достаётся через обычный get_thumbnail.
+    """
+    files = []
+    for post in posts:
+        post.thumbnail = None
+        if post.image:
+            files.append((post, PipelineBackend().thumbnail_file(
+                post.image, geometry_string, dict(options))))
+    found = _kvstore_get_many([thumbnail.key for _, thumbnail in files])
+    for post, thumbnail in files:
+        post.thumbnail = found.get(thumbnail.key)
+        if post.thumbnail is None:
+            post.thumbnail = default.backend.get_thumbnail(
+                post.image, geometry_string, **options)
+    return posts
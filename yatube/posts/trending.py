@@ -0,0 +1,97 @@
+"""«Популярное»: посты и группы по скорости комментариев и постов.
+
+Сигналы создания Post и Comment прибавляют единицу к строке TrendBucket
+текущего интервала (TRENDING_BUCKET секунд) поста или группы: запись
+стоит два коротких запроса, а таблица Comment при показе не читается.
+
+Команда trending раз в несколько минут суммирует интервалы последних
+TRENDING_WINDOW: вклад интервала убывает вдвое за TRENDING_HALF_LIFE
+интервалов, пост группы весит POST_WEIGHT комментариев. Лучшие посты
+и группы кладутся в кэш готовыми отсортированными списками, а более
+старые интервалы удаляются. Пока команда не запускалась, списки пусты.
+"""
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from . import generations
+from .models import Group, Post, TrendBucket
+
+POST_WEIGHT = 3
+POSTS_KEY = 'trending:posts'
+GROUPS_KEY = 'trending:groups'
+
+
+def current_bucket(now=None):
+    return int((now or time.time()) // settings.TRENDING_BUCKET)
+
+
+def record(kind, object_id, field):
+    """Прибавляет единицу к счётчику field текущего интервала."""
+    bucket = current_bucket()
+    with transaction.atomic():
+        TrendBucket.objects.bulk_create(
+            [TrendBucket(kind=kind, object_id=object_id, bucket=bucket)],
+            ignore_conflicts=True)
+        TrendBucket.objects.filter(
+            kind=kind, object_id=object_id, bucket=bucket,
+        ).update(**{field: F(field) + 1})
+
+
+def post_created(post):
+    if post.group_id:
+        record(TrendBucket.GROUP, post.group_id, 'posts')
+
+
+def comment_created(post):
+    record(TrendBucket.POST, post.pk, 'comments')
+    if post.group_id:
+        record(TrendBucket.GROUP, post.group_id, 'comments')
+
+
+def scores(now=None):
+    """Затухающие рейтинги {тип: Counter(id: вес)} за окно интервалов."""
+    now = current_bucket(now)
+    ranked = {TrendBucket.POST: Counter(), TrendBucket.GROUP: Counter()}
+    rows = TrendBucket.objects.filter(
+        bucket__gt=now - settings.TRENDING_WINDOW,
+    ).values_list('kind', 'object_id', 'bucket', 'comments', 'posts')
+    for kind, object_id, bucket, comments, posts in rows.iterator():
+        decay = 0.5 ** ((now - bucket) / settings.TRENDING_HALF_LIFE)
+        ranked[kind][object_id] += (comments + POST_WEIGHT * posts) * decay
+    return ranked
+
+
+def refresh(now=None):
+    """Пересчитывает списки «Популярного» и удаляет старые интервалы."""
+    TrendBucket.objects.filter(
+        bucket__lte=current_bucket(now) - settings.TRENDING_WINDOW,
+    ).delete()
+    ranked = scores(now)
+    top_posts = ranked[TrendBucket.POST].most_common(settings.TRENDING_COUNT)
+    top_groups = ranked[TrendBucket.GROUP].most_common(
+        settings.TRENDING_GROUPS_COUNT)
+    # Название и адрес группы — в том же списке: виджет не ходит в базу.
+    found = Group.objects.in_bulk([pk for pk, _ in top_groups])
+    groups = [{'slug': found[pk].slug, 'title': found[pk].title,
+               'score': score}
+              for pk, score in top_groups if pk in found]
+    cache.set_many({POSTS_KEY: top_posts, GROUPS_KEY: groups}, None)
+    generations.bump(generations.TRENDING)
+    return len(top_posts), len(groups)
+
+
+def posts():
+    """Популярные посты, лучшие первыми."""
+    ranked = cache.get(POSTS_KEY, [])
+    found = Post.objects.for_feed().in_bulk([pk for pk, _ in ranked])
+    return [found[pk] for pk, _ in ranked if pk in found]
+
+
+def groups():
+    """Популярные группы: словари slug, title и score."""
+    return cache.get(GROUPS_KEY, [])
@@ -0,0 +1,129 @@
+"""Приём картинок постов в ограниченной памяти.
+
+LimitedUploadHandler (первый в FILE_UPLOAD_HANDLERS) считает байты ещё
+во время загрузки: всё сверх IMAGE_UPLOAD_MAX_BYTES отбрасывается, не
+доходя до памяти или временного файла, а форма получает RejectedUpload.
+
+normalize() проверяет картинку по заголовку — формат и число пикселей —
+до того, как что-то декодировать. Картинку больше IMAGE_MAX_DIMENSION
+по длинной стороне или с EXIF пересохраняет уменьшенной, повёрнутой по
+EXIF Orientation и без метаданных; JPEG при этом декодируется сразу в
+уменьшенном масштабе (draft). Анимированный GIF так не уменьшить, не
+потеряв кадры, поэтому анимация больше IMAGE_MAX_DIMENSION отклоняется,
+а меньшая сохраняется как есть.
+"""
+import io
+import tempfile
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps
+
+# Форматы, которые принимаются, и параметры пересохранения.
+FORMATS = {
+    'JPEG': {'quality': 90, 'optimize': True},
+    'PNG': {'optimize': True},
+    'GIF': {},
+    'WEBP': {'quality': 90},
+}
+
+
+class RejectedUpload(UploadedFile):
+    """Файл, который LimitedUploadHandler не стал принимать целиком."""
+
+    def __init__(self, name, content_type, size, error):
+        super().__init__(io.BytesIO(), name, content_type, size)
+        self.error = error
+
+
+class LimitedUploadHandler(FileUploadHandler):
+    """Обрывает приём файла, как только он перерос IMAGE_UPLOAD_MAX_BYTES."""
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.IMAGE_UPLOAD_MAX_BYTES:
+            # Следующие обработчики этих байтов уже не увидят.
+            return None
+        return raw_data
+
+    def file_complete(self, file_size):
+        if self.received <= settings.IMAGE_UPLOAD_MAX_BYTES:
+            return None
+        limit = filesizeformat(settings.IMAGE_UPLOAD_MAX_BYTES)
+        return RejectedUpload(
+            self.file_name, self.content_type, self.received,
+            f'Файл слишком большой: можно загрузить не больше {limit}.')
+
+
+def _open(upload):
+    upload.seek(0)
+    try:
+        image = Image.open(upload)
+    except (OSError, Image.DecompressionBombError):
+        raise ValidationError('Не удалось прочитать изображение.',
+                              code='invalid_image')
+    if image.format not in FORMATS:
+        raise ValidationError(
+            'Поддерживаются только JPEG, PNG, GIF и WebP.',
+            code='invalid_image')
+    width, height = image.size
+    if width * height > settings.IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            f'Изображение слишком большое: {width}×{height} пикселей.',
+            code='image_too_large')
+    return image
+
+
+def _load(image, size):
+    # Для JPEG draft() выбирает масштаб декодирования (до 1/8), но сжатые
+    # данные всё равно читаются целиком: обрезанный файл тут и упадёт.
+    image.draft(image.mode, size)
+    try:
+        image.load()
+    except (OSError, SyntaxError, ValueError):
+        raise ValidationError('Файл изображения повреждён.',
+                              code='invalid_image')
+
+
+def normalize(upload):
+    """Проверяет загруженную картинку и готовит её к сохранению.
+
+    Отдаёт тот же upload, если менять нечего, иначе — новый файл
+    с тем же именем. Ошибки — ValidationError.
+    """
+    image = _open(upload)
+    image_format = image.format
+    limit = settings.IMAGE_MAX_DIMENSION
+    oversized = max(image.size) > limit
+    animated = getattr(image, 'is_animated', False)
+    if animated and oversized:
+        raise ValidationError(
+            f'Анимация слишком большая: не больше {limit} пикселей '
+            'по длинной стороне.', code='image_too_large')
+    if animated or not (oversized or 'exif' in image.info):
+        _load(image, (1, 1))
+        upload.seek(0)
+        return upload
+    _load(image, (limit, limit))
+    icc_profile = image.info.get('icc_profile')
+    image = ImageOps.exif_transpose(image)
+    image.info.pop('exif', None)
+    image.thumbnail((limit, limit), Image.LANCZOS)
+    # Пересохранённый файл тоже не держим в памяти целиком.
+    buffer = tempfile.SpooledTemporaryFile(
+        max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+    options = dict(FORMATS[image_format])
+    if icc_profile:
+        options['icc_profile'] = icc_profile
+    image.save(buffer, image_format, **options)
+    size = buffer.tell()
+    buffer.seek(0)
+    return UploadedFile(buffer, upload.name, upload.content_type, size,
+                        upload.charset)
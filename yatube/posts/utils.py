@@ -1,9 +1,221 @@
+from collections import Counter
+from operator import itemgetter
+
 from django.conf import settings
-from django.core.paginator import Paginator
+from django.core import signing
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+CURSOR_SALT = 'posts.cursor'
+
+
+def dump_cursor(values, number, salt=CURSOR_SALT):
+    """Подписанный курсор на ключ (pub_date или ранг, id) страницы number.
+
+    Курсоры с разными ключами подписываются разными salt: курсор поиска
+    на ленте (и наоборот) считается битым.
+    """
+    value, pk = values
+    if hasattr(value, 'isoformat'):
+        value = value.isoformat()
+    return signing.dumps([value, pk, number], salt=salt)
+
+
+def load_cursor(token, salt=CURSOR_SALT):
+    """Возвращает (pub_date или ранг, id, number) или None для битого."""
+    try:
+        value, pk, number = signing.loads(token, salt=salt)
+        if isinstance(value, str):
+            value = parse_datetime(value)
+        else:
+            value = float(value)
+        pk, number = int(pk), int(number)
+    except (signing.BadSignature, TypeError, ValueError):
+        return None
+    if value is None:
+        return None
+    return value, pk, number
+
+
+class FeedSource:
+    """Источник строк ленты, упорядоченных по ключу (pub_date, id).
+
+    rows — QuerySet, key — имена полей даты и id в нём,
+    item — функция, превращающая строку в объект страницы.
+    """
+
+    cursor_salt = CURSOR_SALT
+
+    def __init__(self, name, rows, key=('pub_date', 'pk'), item=None):
+        self.name = name
+        self.rows = rows
+        self.key = key
+        self.item = item
+
+    def queryset(self, cursor, reverse):
+        """Строки после (или перед, если reverse) ключа cursor по порядку."""
+        date_field, id_field = self.key
+        rows = self.rows
+        if cursor is not None:
+            date, pk = cursor
+            op = 'gt' if reverse else 'lt'
+            # Условие на одну дату отдельно от OR: так СУБД берёт
+            # диапазон индекса (date, id) и не сортирует результат.
+            rows = rows.filter(**{f'{date_field}__{op}e': date}).filter(
+                Q(**{f'{date_field}__{op}': date})
+                | Q(**{f'{id_field}__{op}': pk})
+            )
+        if reverse:
+            rows = rows.order_by(date_field, id_field)
+        else:
+            rows = rows.order_by(f'-{date_field}', f'-{id_field}')
+        return rows
+
+    def fetch(self, cursor, reverse, limit):
+        date_field, id_field = self.key
+        return [
+            ((getattr(row, date_field), getattr(row, id_field)), self.name,
+             self.item(row) if self.item else row)
+            for row in self.queryset(cursor, reverse)[:limit]
+        ]
+
+
+class CursorPaginator(Paginator):
+    """Пагинация по ключу (pub_date, id) без COUNT(*) и OFFSET.
+
+    Страница выбирается одним запросом с условием по ключу последней
+    (или первой) строки соседней страницы, поэтому её стоимость не зависит
+    от глубины. Общее число страниц неизвестно: num_pages и page_range
+    описывают только текущую и, если она есть, следующую страницу.
+
+    Вместо QuerySet можно передать список FeedSource: страница тогда
+    собирается слиянием источников по ключу.
+    """
+
+    def __init__(self, object_list, per_page):
+        super().__init__(object_list, per_page)
+        if isinstance(object_list, (list, tuple)):
+            self.sources = object_list
+        else:
+            self.sources = [FeedSource('default', object_list)]
+        # Источники одной страницы упорядочены по ключу одного вида.
+        self.cursor_salt = self.sources[0].cursor_salt
+        self.number = 1
+        self.has_more = False
+
+    @property
+    def num_pages(self):
+        return self.number + 1 if self.has_more else self.number
+
+    @property
+    def page_range(self):
+        return range(self.number, self.number + 1)
+
+    def fetch(self, cursor, reverse, limit):
+        rows = [row for source in self.sources
+                for row in source.fetch(cursor, reverse, limit)]
+        rows.sort(key=itemgetter(0), reverse=not reverse)
+        return rows[:limit]
+
+    def get_page(self, after=None, before=None):
+        """Страница после курсора after или перед курсором before.
+
+        Битый или поддельный курсор, как и в Paginator.get_page,
+        не приводит к ошибке: возвращается первая страница.
+        """
+        cursor = (load_cursor(before or after, self.cursor_salt)
+                  if before or after else None)
+        reverse = cursor is not None and bool(before)
+        rows = self.fetch(cursor and cursor[:2], reverse,
+                          self.per_page + 1)
+        more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if cursor is None:
+            self.number, self.has_more = 1, more
+        elif reverse:
+            rows.reverse()
+            self.number = max(cursor[2], 2) if more else 1
+            self.has_more = True
+        else:
+            self.number, self.has_more = max(cursor[2], 2), more
+        page = Page([item for _, _, item in rows], self.number, self)
+        page.source_counts = Counter(name for _, name, _ in rows)
+        page.next_cursor = page.previous_cursor = None
+        if rows and page.has_next():
+            page.next_cursor = dump_cursor(rows[-1][0], self.number + 1,
+                                           self.cursor_salt)
+        if rows and page.has_previous():
+            page.previous_cursor = dump_cursor(rows[0][0], self.number - 1,
+                                               self.cursor_salt)
+        return page
+
+
+def _query(request, **params):
+    query = request.GET.copy()
+    for name in ('page', 'after', 'before'):
+        query.pop(name, None)
+    query.update(params)
+    return query.urlencode()
+
+
+def page_window(request, number, num_pages):
+    """Ссылки на первую, последнюю и ±PAGINATOR_WINDOW соседних страниц.
+
+    Возвращает пары (номер, query string); пропуск обозначен (None, None).
+    """
+    size = settings.PAGINATOR_WINDOW
+    numbers = sorted({1, num_pages}.union(
+        range(max(1, number - size), min(num_pages, number + size) + 1)))
+    window, previous = [], 0
+    for current in numbers:
+        if current - previous > 1:
+            window.append((None, None))
+        window.append((current, _query(request, page=current)))
+        previous = current
+    return window
+
+
+def _post_key(post):
+    return post.pub_date, post.pk
+
 
+def get_paginator(posts, request, legacy=None):
+    """Страница ленты по курсорам ?after= / ?before=.
 
-def get_paginator(posts, request):
-    paginator = Paginator(posts, settings.COUNT_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    return(page_obj)
+    posts — QuerySet постов или список FeedSource. Старые ссылки вида
+    ?page=N обслуживаются обычным Paginator по QuerySet legacy (по
+    умолчанию — по posts, если это QuerySet), но ссылки «вперёд» и «назад»
+    с такой страницы уже курсорные.
+    """
+    after = request.GET.get('after')
+    before = request.GET.get('before')
+    if legacy is None and not isinstance(posts, (list, tuple)):
+        legacy = posts
+    if legacy is not None and 'page' in request.GET and not (after or before):
+        paginator = Paginator(legacy, settings.COUNT_POSTS)
+        page_obj = paginator.get_page(request.GET.get('page'))
+        rows = page_obj.object_list = list(page_obj.object_list)
+        page_obj.source_counts = Counter(default=len(rows))
+        page_obj.next_cursor = page_obj.previous_cursor = None
+        if page_obj.has_next():
+            page_obj.next_cursor = dump_cursor(_post_key(rows[-1]),
+                                               page_obj.number + 1)
+        if page_obj.has_previous():
+            page_obj.previous_cursor = dump_cursor(_post_key(rows[0]),
+                                                   page_obj.number - 1)
+        page_obj.last_query = _query(request, page=paginator.num_pages)
+        page_obj.page_window = page_window(request, page_obj.number,
+                                           paginator.num_pages)
+    else:
+        paginator = CursorPaginator(posts, settings.COUNT_POSTS)
+        page_obj = paginator.get_page(after=after, before=before)
+        page_obj.last_query = None
+        page_obj.page_window = [(page_obj.number, None)]
+    page_obj.first_query = _query(request)
+    page_obj.next_query = (page_obj.next_cursor
+                           and _query(request, after=page_obj.next_cursor))
+    page_obj.previous_query = (
+        page_obj.previous_cursor
+        and _query(request, before=page_obj.previous_cursor))
+    return page_obj
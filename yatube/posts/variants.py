@@ -0,0 +1,130 @@
+"""Варианты картинок постов для <picture>/srcset.
+
+Из каждой картинки строятся кадры карточки ленты (соотношение сторон
+960x339) шириной IMAGE_VARIANT_WIDTHS во всех форматах, которые умеет
+сохранять установленный Pillow: AVIF, WebP и JPEG. Браузер сам берёт
+первый понятный ему формат и ширину под свой экран.
+"""
+import functools
+import hashlib
+import io
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from .models import ImageVariant
+from .storage import image_storage
+
+# Соотношение сторон кадра — как у миниатюры 960x339 в ленте.
+ASPECT = 339 / 960
+SIZES = '(max-width: 960px) 100vw, 960px'
+
+# В порядке предпочтения: браузер берёт первый <source>, который понимает.
+FORMATS = (
+    ('avif', 'image/avif', 'AVIF', {'quality': 60}),
+    ('webp', 'image/webp', 'WEBP', {'quality': 75, 'method': 4}),
+    ('jpeg', 'image/jpeg', 'JPEG', {'quality': 80, 'progressive': True,
+                                    'optimize': True}),
+)
+
+
+@functools.lru_cache(maxsize=None)
+def is_supported(pil_format):
+    """Умеет ли Pillow сохранять в pil_format (кодеки бывают не собраны)."""
+    try:
+        Image.new('RGB', (1, 1)).save(io.BytesIO(), pil_format)
+    except (KeyError, OSError):
+        return False
+    return True
+
+
+def formats():
+    return [fmt for fmt in FORMATS if is_supported(fmt[2])]
+
+
+def _path(name, width, extension):
+    digest = hashlib.sha1(name.encode()).hexdigest()
+    return f'variants/{digest[:2]}/{digest}/{width}.{extension}'
+
+
+def build(name):
+    """Строит (или перестраивает) все варианты картинки name."""
+    with image_storage.open(name) as file:
+        image = Image.open(file)
+        image.load()
+    image = ImageOps.exif_transpose(image).convert('RGB')
+    ImageVariant.objects.filter(source=name).delete()
+    variants = []
+    for width in settings.IMAGE_VARIANT_WIDTHS:
+        size = (width, round(width * ASPECT))
+        frame = ImageOps.fit(image, size, Image.LANCZOS)
+        for extension, _, pil_format, options in formats():
+            buffer = io.BytesIO()
+            frame.save(buffer, pil_format, **options)
+            path = _path(name, width, extension)
+            if default_storage.exists(path):
+                default_storage.delete(path)
+            default_storage.save(path, ContentFile(buffer.getvalue()))
+            variants.append(ImageVariant(
+                source=name, format=extension, width=size[0],
+                height=size[1], file=path, size=buffer.tell()))
+    ImageVariant.objects.bulk_create(variants)
+    return variants
+
+
+def delete(name):
+    for variant in ImageVariant.objects.filter(source=name):
+        variant.file.delete(save=False)
+    ImageVariant.objects.filter(source=name).delete()
+
+
+class VariantSet:
+    """Варианты одной картинки, сгруппированные для шаблона picture."""
+
+    sizes = SIZES
+
+    def __init__(self, variants):
+        self.by_format = {}
+        for variant in sorted(variants, key=lambda item: item.width):
+            self.by_format.setdefault(variant.format, []).append(variant)
+        # Форматы в порядке предпочтения; JPEG — запасной <img>.
+        self.formats = [extension for extension, *_ in FORMATS
+                        if extension in self.by_format]
+        self.sources = [
+            {'type': mime, 'srcset': self.srcset(self.by_format[extension])}
+            for extension, mime, *_ in FORMATS
+            if extension in self.by_format and extension != 'jpeg'
+        ]
+        fallback = self.by_format.get('jpeg',
+                                      self.by_format[self.formats[-1]])
+        self.fallback_srcset = self.srcset(fallback)
+        self.fallback = fallback[-1]
+
+    @staticmethod
+    def srcset(variants):
+        return ', '.join(f'{variant.file.url} {variant.width}w'
+                         for variant in variants)
+
+    def best(self, width):
+        """Вариант, который браузер выберет для кадра шириной width."""
+        candidates = self.by_format[self.formats[0]]
+        for variant in candidates:
+            if variant.width >= width:
+                return variant
+        return candidates[-1]
+
+
+def resolve(posts):
+    """Проставляет post.variants (VariantSet или None) одним запросом."""
+    posts = list(posts)
+    names = {post.image.name for post in posts if post.image}
+    grouped = {}
+    if names:
+        for variant in ImageVariant.objects.filter(source__in=names):
+            grouped.setdefault(variant.source, []).append(variant)
+    for post in posts:
+        variants = grouped.get(post.image.name) if post.image else None
+        post.variants = VariantSet(variants) if variants else None
+    return posts
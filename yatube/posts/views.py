@@ -1,57 +1,132 @@
+import json
+import logging
+from functools import partial
+from http import HTTPStatus
+
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.views.decorators.http import require_POST
 
 from posts.utils import get_paginator
+from . import (cards, counters, feed, follow_sets, follows, generations,
+               recommendations, thumbnails, trending)
+from .conditional import respond
 from .forms import CommentForm, PostForm
 from .models import Follow, Group, Post, User
+from .search import SearchSource
+
+logger = logging.getLogger(__name__)
+
+# Наибольший id, который база примет в запросе (INTEGER в SQLite).
+MAX_ID = 2 ** 63 - 1
 
 
 def index(request):
-    posts = Post.objects.all()
-    page_obj = get_paginator(posts, request)
-    return render(request, 'posts/index.html', {
-        'page_obj': page_obj, })
+    def page():
+        posts = Post.objects.for_feed()
+        page_obj = get_paginator(posts, request)
+        return render(request, 'posts/index.html', {
+            'feed_cache': generations.feed_cache(
+                generations.INDEX, cards=cards.page_scopes(page_obj)),
+            'trending_groups': trending.groups(),
+            'page_obj': page_obj, })
+    return respond(request, [generations.INDEX, generations.TRENDING,
+                             generations.NAMES], page)
 
 
 def group_posts(request, slug):
     """Страница на которой будут посты, отфильтрованные по группам."""
     group = get_object_or_404(Group, slug=slug)
-    posts = group.post_group.all()
-    page_obj = get_paginator(posts, request)
 
-    return render(request, 'posts/group_list.html', {
-        'group': group,
-        'page_obj': page_obj, })
+    def page():
+        posts = group.post_group.for_feed()
+        page_obj = get_paginator(posts, request)
+        return render(request, 'posts/group_list.html', {
+            'feed_cache': generations.feed_cache(
+                generations.group(group.pk),
+                cards=cards.page_scopes(page_obj)),
+            'group': group,
+            'page_obj': page_obj, })
+    return respond(request, [generations.group(group.pk), generations.NAMES],
+                   page)
 
 
 def profile(request, username):
     """Страница на которой будут посты, отфильтрованные по автору"""
 
     author = get_object_or_404(User, username=username)
-    following = (request.user.is_authenticated
-                 and Follow.objects.filter(user=request.user,
-                                           author=author).exists())
-    posts = Post.objects.filter(author=author)
-    counter_posts = posts.count()
-    page_obj = get_paginator(posts, request)
-    return render(request, 'posts/profile.html', {
-        'following': following,
-        'author': author,
-        'counter_posts': counter_posts,
+    following = author.pk in follow_sets.following(request.user)
+    stats = counters.user_stats(author)
+    # Рекомендации показываются только в собственном профиле.
+    own = request.user == author
+    scopes = [generations.author(author.pk), generations.NAMES]
+    if own:
+        scopes += recommendations.scopes(author)
+
+    def page():
+        posts = Post.objects.for_feed().filter(author=author)
+        page_obj = get_paginator(posts, request)
+        return render(request, 'posts/profile.html', {
+            'feed_cache': generations.feed_cache(
+                generations.author(author.pk),
+                cards=cards.page_scopes(page_obj)),
+            'following': following,
+            'suggestions': recommendations.for_user(author) if own else [],
+            'author': author,
+            'stats': stats,
+            'counter_posts': stats.posts_count,
+            'page_obj': page_obj, })
+    # Подписки меняют кнопку и счётчики профиля, но не поколение автора.
+    return respond(request, scopes, page, (
+        following, stats.followers_count, stats.following_count))
+
+
+def trending_posts(request):
+    """Популярные посты и группы: по скорости комментариев и постов."""
+    return render(request, 'posts/trending.html', {
+        'posts': trending.posts(),
+        'trending_groups': trending.groups(), })
+
+
+def search(request):
+    """Поиск по текстам постов и комментариев, лучшие совпадения первыми."""
+    query = request.GET.get('q', '').strip()
+    page_obj = get_paginator([SearchSource(query)], request)
+    return render(request, 'posts/search.html', {
+        'query': query,
         'page_obj': page_obj, })
 
 
 def post_detail(request, post_id):
-    one_post = get_object_or_404(Post, pk=post_id)
-    author = get_object_or_404(User, username=one_post.author)
-    posts_count = author.post_author.count()
-    form = CommentForm()
-    comments = one_post.comments.all()
-    return render(request, 'posts/post_detail.html', {
-        'posts_count': posts_count,
-        'one_post': one_post,
-        'form': form,
-        'comments': comments, })
+    one_post = get_object_or_404(Post.objects.select_related('author'),
+                                 pk=post_id)
+
+    def page():
+        posts_count = counters.user_stats(one_post.author).posts_count
+        form = CommentForm()
+        comments = one_post.comments.order_by('created')
+        return render(request, 'posts/post_detail.html', {
+            'posts_count': posts_count,
+            'comments_count': counters.post_stats(one_post).comments_count,
+            'one_post': one_post,
+            'form': form,
+            'comments': comments, })
+    # Правки поста и комментарии к нему меняют поколение автора;
+    # NAMES — новые имена авторов комментариев.
+    scopes = [generations.author(one_post.author_id),
+              generations.user(one_post.author_id), generations.NAMES]
+    if one_post.group_id:
+        scopes.append(generations.group_info(one_post.group_id))
+    return respond(request, scopes, page)
+
+
+def _enqueue_thumbnails(post):
+    # Миниатюры строятся после коммита, когда пост и файл уже сохранены.
+    if post.image:
+        transaction.on_commit(partial(thumbnails.enqueue, post.image.name))
 
 
 @login_required
@@ -62,6 +137,7 @@ def post_create(request):
     post = form.save(commit=False)
     post.author = request.user
     form.save()
+    _enqueue_thumbnails(post)
     return redirect('posts:profile', post.author)
 
 
@@ -78,6 +154,7 @@ def post_edit(request, post_id):
         return render(request, 'posts/create_post.html', {
                       'form': form, 'is_edit': is_edit, 'post': post})
     form.save()
+    _enqueue_thumbnails(post)
     return redirect('posts:post_detail', post.pk)
 
 
@@ -95,23 +172,77 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user)
-    page_obj = get_paginator(posts, request)
-    return render(request, 'posts/follow.html', {
-        'page_obj': page_obj})
+    scopes = [generations.INDEX, generations.follow(request.user.pk)]
+
+    def page():
+        posts = Post.objects.for_feed().filter(
+            author__following__user=request.user)
+        page_obj = get_paginator(feed.follow_sources(request.user),
+                                 request, legacy=posts)
+        response = render(request, 'posts/follow.html', {
+            'feed_cache': generations.feed_cache(
+                *scopes, cards=cards.page_scopes(page_obj)),
+            'suggestions': recommendations.for_user(request.user),
+            'page_obj': page_obj})
+        response['X-Feed-Sources'] = ', '.join(
+            f'{name}={count}'
+            for name, count in sorted(page_obj.source_counts.items()))
+        logger.info('follow_index user=%s %s', request.user.pk,
+                    response['X-Feed-Sources'])
+        return response
+    return respond(request, [*scopes, generations.NAMES,
+                             *recommendations.scopes(request.user)], page)
 
 
 @login_required
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
-    if request.user != author:
-        Follow.objects.get_or_create(user=request.user, author=author)
+    follows.follow(request.user, User.objects.filter(username=username))
     return redirect('posts:profile', username=username)
 
 
 @login_required
 def profile_unfollow(request, username):
-    author = get_object_or_404(User, username=username)
-    if request.user != author:
-        Follow.objects.filter(user=request.user, author=author).delete()
+    follows.unfollow(request.user, User.objects.filter(username=username))
     return redirect('posts:profile', username=username)
+
+
+def _bulk_authors(request):
+    """{"follow": [id, ...], "unfollow": [id, ...]} из тела запроса."""
+    data = json.loads(request.body)
+    authors = {}
+    for action in ('follow', 'unfollow'):
+        ids = data.get(action, [])
+        if not isinstance(ids, list):
+            raise TypeError(action)
+        authors[action] = [int(pk) for pk in ids]
+        if not all(0 < pk <= MAX_ID for pk in authors[action]):
+            raise ValueError(action)
+    return authors
+
+
+@login_required
+@require_POST
+def follow_bulk(request):
+    """Подписка и отписка от многих авторов одной транзакцией."""
+    try:
+        authors = _bulk_authors(request)
+    except (AttributeError, TypeError, ValueError):
+        return JsonResponse({'error': 'Ожидается JSON вида {"follow": '
+                                      '[id, ...], "unfollow": [id, ...]}.'},
+                            status=HTTPStatus.BAD_REQUEST)
+    requested = authors['follow'] + authors['unfollow']
+    if len(requested) > settings.FOLLOW_BULK_LIMIT:
+        return JsonResponse(
+            {'error': f'Не больше {settings.FOLLOW_BULK_LIMIT} авторов '
+                      'за запрос.'},
+            status=HTTPStatus.BAD_REQUEST)
+    with transaction.atomic():
+        follows.follow(request.user,
+                       User.objects.filter(pk__in=authors['follow']))
+        follows.unfollow(request.user,
+                         User.objects.filter(pk__in=authors['unfollow']))
+    following = set(Follow.objects.filter(
+        user=request.user, author_id__in=requested).values_list(
+            'author_id', flat=True))
+    return JsonResponse(
+        {'following': {pk: pk in following for pk in requested}})
@@ -0,0 +1,17 @@
+"""
+ASGI config for yatube project.
+
+It exposes the ASGI callable as a module-level variable named
+``application``: run it with any ASGI server, for example
+``uvicorn yatube.asgi:application``. Django 2.2 has no ASGI handler of its
+own, so views run in a thread pool through core.asgi.WsgiToAsgi.
+"""
+
+import os
+
+from core.asgi import WsgiToAsgi
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+application = WsgiToAsgi(get_wsgi_application())
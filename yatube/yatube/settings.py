@@ -46,6 +46,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.ReplicaPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -83,9 +84,34 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        # sqlite3 с BEGIN IMMEDIATE: писатели ждут друг друга (core.sqlite3).
+        'ENGINE': 'core.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+        # Соединение переиспользуется запросами одного потока воркера.
+        'CONN_MAX_AGE': 600,
+    },
+    # Локальная реплица для чтения: копия default, которую обновляет
+    # `python manage.py replicate`. В тестах — зеркало default.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.replica.sqlite3'),
+        'CONN_MAX_AGE': 600,
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+DATABASE_REPLICAS = ['replica']
+# После записи браузер читает с основной базы, пока реплики не догонят.
+REPLICA_PIN_COOKIE = 'primary'
+REPLICA_PIN_SECONDS = 30
+# Выполняются при открытии каждого соединения с SQLite (core.db).
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
 }
 
 
@@ -135,9 +161,60 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {
+            'MAX_BYTES': 64 * 1024 * 1024,
+        },
     }
 }
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 COUNT_POSTS = 10
+# Авторы, у которых подписчиков больше порога, не раскладываются по лентам
+# Inbox при публикации: их посты подмешиваются в ленту подписок при показе.
+FEED_PULL_THRESHOLD = 1000
+# Сколько авторов можно подписать или отписать одним запросом follow/bulk/.
+FOLLOW_BULK_LIMIT = 200
+# Сколько авторов хранить и показывать в блоке «Кого почитать».
+SUGGESTIONS_COUNT = 5
+# «Популярное»: активность считается по интервалам TRENDING_BUCKET секунд,
+# в рейтинг входят последние TRENDING_WINDOW интервалов, вклад интервала
+# убывает вдвое за TRENDING_HALF_LIFE интервалов.
+TRENDING_BUCKET = 60 * 60
+TRENDING_WINDOW = 48
+TRENDING_HALF_LIFE = 6
+TRENDING_COUNT = 20
+TRENDING_GROUPS_COUNT = 5
+# Сколько соседних страниц показывать по обе стороны от текущей.
+PAGINATOR_WINDOW = 2
+# Время жизни фрагментов лент в кэше: они сбрасываются сменой поколения.
+FEED_CACHE_TIMEOUT = 60 * 60
+# Сколько секунд после срока (или смены поколения) фрагмент ленты ещё
+# можно отдавать, пока другой воркер его пересчитывает.
+FEED_CACHE_GRACE = 60
+# Карточки постов сбрасываются сменой версии, поэтому живут дольше лент.
+POST_CARD_TIMEOUT = 24 * 60 * 60
+# Множества подписок (posts.follow_sets) тоже сбрасываются сменой поколения.
+FOLLOW_SET_TIMEOUT = 24 * 60 * 60
+# Поиск: 'fts5' (SQLite FTS5), 'python' (обратный индекс в таблице
+# SearchTerm) или 'auto' — FTS5, если СУБД его поддерживает.
+SEARCH_BACKEND = 'auto'
+# Миниатюры строятся заранее в пуле из THUMBNAIL_WORKERS процессов;
+# 0 — строить сразу, при рендере шаблона.
+THUMBNAIL_BACKEND = 'posts.thumbnails.PipelineBackend'
+THUMBNAIL_WORKERS = 2
+# Ширины кадров <picture>/srcset для картинок постов.
+IMAGE_VARIANT_WIDTHS = (480, 720, 960)
+# Загрузка картинок: файл больше IMAGE_UPLOAD_MAX_BYTES отбрасывается ещё
+# при приёме, картинка больше IMAGE_MAX_PIXELS пикселей не декодируется,
+# а длинная сторона больше IMAGE_MAX_DIMENSION уменьшается до сохранения
+# (анимированный GIF такого размера отклоняется).
+FILE_UPLOAD_HANDLERS = [
+    'posts.uploads.LimitedUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+IMAGE_UPLOAD_MAX_BYTES = 10 * 1024 * 1024
+IMAGE_MAX_PIXELS = 24_000_000
+IMAGE_MAX_DIMENSION = 2560
@@ -0,0 +1,20 @@
+"""Настройки для тестов (manage.py test и pytest).
+
+Кэш — свой файл во временном каталоге на каждый прогон: иначе
+cache.clear() в тестах стирал бы кэш runserver, а поколения и фрагменты
+переживали бы прогон.
+"""
+import atexit
+import os
+import shutil
+import tempfile
+
+from .settings import *  # noqa: F401,F403
+from .settings import CACHES
+
+TEST_CACHE_DIR = tempfile.mkdtemp(prefix='yatube-cache-')
+atexit.register(shutil.rmtree, TEST_CACHE_DIR, ignore_errors=True)
+CACHES = {
+    'default': dict(CACHES['default'],
+                    LOCATION=os.path.join(TEST_CACHE_DIR, 'cache.sqlite3')),
+}